@@ -0,0 +1,204 @@
+"""Benchmarks of the Python side of pyMaBoSS.
+
+Each benchmark is timed for growing model or output sizes, and the script
+reports the time of each size and the scaling exponent (the slope of the
+log-log curve). MaBoSS is replaced by the stub of the test suite, so the
+benchmarks run offline and only measure the overhead of pyMaBoSS.
+
+Usage::
+
+    python benchmark/run_benchmarks.py                    # report
+    python benchmark/run_benchmarks.py --save base.json   # store timings
+    python benchmark/run_benchmarks.py --compare base.json --threshold 1.5
+
+With ``--compare``, the script exits with a non 0 value if a benchmark is
+more than ``threshold`` times slower than in the stored timings.
+"""
+
+
+import argparse
+import io
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+from os.path import abspath, dirname, join
+
+ROOT = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, dirname(abspath(__file__)))
+os.environ["PATH"] = (join(ROOT, "test", "stub") + os.pathsep
+                      + os.environ["PATH"])
+
+import pandas as pd
+
+from maboss import gsparser, result
+from maboss.network import Network
+import synthetic
+
+
+def bench_load_fixture(size, tmp):
+    bnd, cfg = join(ROOT, "test", "reprod_all.bnd"), join(ROOT, "test",
+                                                          "reprod_all.cfg")
+    return lambda: gsparser.load(bnd, cfg)
+
+
+def bench_load(size, tmp):
+    bnd, cfg = _write_model(size, tmp)
+    return lambda: gsparser.load(bnd, cfg)
+
+
+def bench_parse_bnd(size, tmp):
+    text = synthetic.make_bnd(size)
+    return lambda: gsparser._parse_bnd(text)
+
+
+def bench_parse_cfg(size, tmp):
+    text = synthetic.make_cfg(size)
+    return lambda: gsparser._parse_cfg(text)
+
+
+def bench_network(size, tmp):
+    nodes = list(gsparser.load(*_write_model(size, tmp)).network.values())
+    return lambda: Network(nodes)
+
+
+def bench_print_bnd(size, tmp):
+    sim = gsparser.load(*_write_model(size, tmp))
+    return lambda: sim.print_bnd(out=io.StringIO())
+
+
+def bench_print_cfg(size, tmp):
+    sim = gsparser.load(*_write_model(size, tmp))
+    return lambda: sim.print_cfg(out=io.StringIO())
+
+
+def bench_trajectory_table(size, tmp):
+    df = _probtraj(size)
+    return lambda: result.make_trajectory_table(df)
+
+
+def bench_node_table(size, tmp):
+    df = _probtraj(size)
+    return lambda: result.make_node_proba_table(df)
+
+
+def bench_read_probtraj(size, tmp):
+    path = join(tmp, "p%d_probtraj.csv" % size)
+    with open(path, 'w') as out:
+        out.write(synthetic.make_probtraj(size, max(2, size // 2)))
+    return lambda: result.ProbTraj.from_file(path)
+
+
+def bench_run(size, tmp):
+    sim = gsparser.load(*_write_model(size, tmp))
+    sim.update_parameters(max_time=1)
+    return lambda: sim.run().get_nodes_probtraj()
+
+
+# name: (function, sizes)
+BENCHMARKS = {
+    "load_fixture": (bench_load_fixture, [1]),
+    "load": (bench_load, [25, 50, 100, 200]),
+    "parse_bnd": (bench_parse_bnd, [500, 1000, 2000, 4000]),
+    "parse_cfg": (bench_parse_cfg, [500, 1000, 2000, 4000]),
+    "network": (bench_network, [25, 50, 100, 200]),
+    "print_bnd": (bench_print_bnd, [100, 200, 400, 800]),
+    "print_cfg": (bench_print_cfg, [100, 200, 400, 800]),
+    "trajectory_table": (bench_trajectory_table, [250, 500, 1000, 2000]),
+    "node_table": (bench_node_table, [250, 500, 1000, 2000]),
+    "read_probtraj": (bench_read_probtraj, [250, 500, 1000, 2000]),
+    "run": (bench_run, [50, 200]),
+}
+
+
+def _write_model(size, tmp):
+    bnd, cfg = join(tmp, "m%d.bnd" % size), join(tmp, "m%d.cfg" % size)
+    with open(bnd, 'w') as out:
+        out.write(synthetic.make_bnd(size))
+    with open(cfg, 'w') as out:
+        out.write(synthetic.make_cfg(size))
+    return bnd, cfg
+
+
+def _probtraj(size):
+    """A probtraj with size time points and size / 2 states."""
+    text = synthetic.make_probtraj(size, max(2, size // 2))
+    return pd.read_csv(io.StringIO(text), sep="\t")
+
+
+def measure(name, repeat=3):
+    """Return the best time of each size of the benchmark."""
+    function, sizes = BENCHMARKS[name]
+    timings = {}
+    tmp = tempfile.mkdtemp()
+    try:
+        for size in sizes:
+            statement = function(size, tmp)
+            number, _ = timeit.Timer(statement).autorange()
+            best = min(timeit.repeat(statement, number=number, repeat=repeat))
+            timings[size] = best / number
+    finally:
+        shutil.rmtree(tmp)
+    return timings
+
+
+def scaling(timings):
+    """Return the slope of log(time) against log(size)."""
+    points = [(math.log(s), math.log(t)) for s, t in timings.items() if t > 0]
+    if len(points) < 2:
+        return None
+    mx = sum(x for x, _ in points) / len(points)
+    my = sum(y for _, y in points) / len(points)
+    var = sum((x - mx) ** 2 for x, _ in points)
+    return sum((x - mx) * (y - my) for x, y in points) / var
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("names", nargs="*", help="benchmarks to run")
+    parser.add_argument("--save", help="store the timings in a json file")
+    parser.add_argument("--compare", help="compare with a json file")
+    parser.add_argument("--threshold", type=float, default=1.5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    reference = {}
+    if args.compare:
+        with open(args.compare) as f:
+            reference = json.load(f)
+
+    all_timings = {}
+    regressions = []
+    for name in args.names or BENCHMARKS:
+        timings = measure(name, args.repeat)
+        all_timings[name] = {str(s): t for s, t in timings.items()}
+        slope = scaling(timings)
+        print("%s (scaling: %s)" % (name, "n/a" if slope is None
+                                    else "n^%.2f" % slope))
+        for size, t in timings.items():
+            line = "  %8d  %10.3f ms" % (size, t * 1000)
+            ref = reference.get(name, {}).get(str(size))
+            if ref:
+                ratio = t / ref
+                line += "  x%.2f" % ratio
+                if ratio > args.threshold:
+                    line += "  REGRESSION"
+                    regressions.append((name, size, ratio))
+            print(line)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(all_timings, f, indent=2, sort_keys=True)
+    if regressions:
+        print("%d regression(s) above x%.2f" % (len(regressions),
+                                                 args.threshold))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,67 @@
+"""Generators of synthetic models and MaBoSS outputs for the benchmarks."""
+
+
+import random
+
+
+def make_bnd(nb_nodes, seed=0):
+    """Return the bnd text of a random network of nb_nodes nodes."""
+    rng = random.Random(seed)
+    names = node_names(nb_nodes)
+    nodes = []
+    for name in names:
+        inputs = rng.sample(names, min(3, nb_nodes))
+        logic = " | ".join("(%s%s & %s)" % ("!" if rng.random() < 0.3 else "",
+                                           a, b)
+                           for a, b in zip(inputs, inputs[1:] + inputs[:1]))
+        nodes.append("Node %s {\n"
+                     "  logic = %s;\n"
+                     "  rate_up = @logic ? $u_%s : 0;\n"
+                     "  rate_down = @logic ? 0 : $d_%s;\n"
+                     "}\n" % (name, logic, name, name))
+    return "\n".join(nodes)
+
+
+def make_cfg(nb_nodes):
+    """Return the cfg text associated with make_bnd(nb_nodes)."""
+    names = node_names(nb_nodes)
+    lines = []
+    for name in names:
+        lines.append("$u_%s = 1;" % name)
+        lines.append("$d_%s = 1;" % name)
+    for name in names:
+        lines.append("%s.istate = 0;" % name)
+    lines += ["time_tick = 0.1;", "max_time = 10;", "sample_count = 1000;",
+              "discrete_time = 0;", "use_physrandgen = 0;",
+              "seed_pseudorandom = 0;", "thread_count = 1;"]
+    for i, name in enumerate(names):
+        lines.append("%s.is_internal = %d;" % (name, i % 2))
+    return "\n".join(lines) + "\n"
+
+
+def make_probtraj(nb_times, nb_states, nb_nodes=10, seed=0):
+    """Return the text of a probtraj file with nb_times time points, among
+    which nb_states distinct states are reached."""
+    rng = random.Random(seed)
+    names = node_names(nb_nodes)
+    states = set(["<nil>"])
+    while len(states) < nb_states:
+        states.add(" -- ".join(n for n in names if rng.random() < 0.5)
+                   or "<nil>")
+    states = sorted(states)
+    width = min(nb_states, 50)
+    lines = ["Time\tTH\tErrorTH\tH\tHD=0"
+             + "\tState\tProba\tErrorProba" * width]
+    for t in range(nb_times):
+        reached = rng.sample(states, rng.randint(1, width))
+        probas = [rng.random() for _ in reached]
+        total = sum(probas)
+        fields = ["%g" % (t / 10), "0", "0", "0", "0"]
+        for state, proba in zip(reached, probas):
+            fields += [state, repr(proba / total), "0"]
+        lines.append("\t".join(fields))
+    return "\n".join(lines) + "\n"
+
+
+def node_names(nb_nodes):
+    return ["N%d" % i for i in range(nb_nodes)]
@@ -1,6 +1,12 @@
 from .network import *
 from .simulation import *
 from .result import *
+from .batch import *
+from .cache import *
+from .sweep import *
+from .screen import *
+from .replicates import *
+from .backends import *
 from .gsparser import load
 
 
@@ -0,0 +1,293 @@
+"""Backends that run MaBoSS for :py:meth:`Simulation.run`.
+
+A backend has a ``run(simul, compact, workdir, in_memory)`` method that
+returns a :py:class:`Result`. :py:class:`LocalBackend` runs MaBoSS in a
+subprocess, like :py:meth:`Simulation.run` does by default, and
+:py:class:`SpoolBackend` sends the simulations to workers through a job queue
+in a shared directory.
+"""
+
+
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import signal
+import subprocess
+import sys
+import time
+import uuid
+from time import perf_counter, sleep
+
+from .result import Result, _write_text
+
+
+class LocalBackend(object):
+    """Run MaBoSS in a subprocess of the current process."""
+
+    capacity = os.cpu_count() or 1
+
+    def run(self, simul, compact=False, workdir=None, in_memory=False):
+        return Result(simul, compact=compact, workdir=workdir,
+                      in_memory=in_memory)
+
+
+class SpoolBackend(object):
+    """
+    Run MaBoSS in workers that take their jobs from a spool directory.
+
+    :param str spool: the spool directory, which must be shared with the
+        workers. It is created if needed.
+    :param int workers: the number of workers started on this machine. Workers
+        on other machines sharing the directory are started with
+        ``python -m maboss.backends <spool>``.
+    :param float timeout: the number of seconds after which a worker kills
+        MaBoSS
+    :param int retries: the number of times a job is submitted again if
+        MaBoSS fails or times out
+    :param float interval: the delay between two checks of the spool
+    :param float stale: the number of seconds after which a running job
+        whose worker gave no sign of life is considered failed
+
+    Each job is a directory holding the bnd and cfg files. It is moved from
+    ``queue`` to ``running`` by the worker that takes it, and to ``done``
+    once MaBoSS terminated, with its output files and a ``status.json`` file.
+    The :py:class:`Result` of a job reads its ``done`` directory, and removes
+    it when it is closed.
+
+    While MaBoSS runs, the worker touches the job directory every second. A
+    job that is not touched for `stale` seconds, or that runs `stale` seconds
+    longer than `timeout`, is considered failed and removed from
+    ``running``, so that a worker that died does not block the client.
+
+    **Example**
+
+    >>> with SpoolBackend("/shared/spool", workers=4, retries=1) as backend:
+    ...     results = run_simulations(mutants, backend=backend)
+    """
+
+    def __init__(self, spool, workers=0, timeout=None, retries=0,
+                 interval=0.05, stale=60):
+        self.spool = spool
+        self.timeout = timeout
+        self.retries = retries
+        self.interval = interval
+        self.stale = stale
+        self.capacity = workers or os.cpu_count() or 1
+        for name in _spool_dirs:
+            os.makedirs(os.path.join(spool, name), exist_ok=True)
+        self._workers = [
+            multiprocessing.Process(target=_local_worker,
+                                    name="worker-" + uuid.uuid4().hex,
+                                    args=(spool, interval), daemon=True)
+            for _ in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def run(self, simul, compact=False, workdir=None, in_memory=False):
+        """Submit simul and wait for its :py:class:`Result`, submitting it
+        again on failure. workdir is not used, the job runs in the spool."""
+        for attempt in range(self.retries + 1):
+            if attempt:
+                shutil.rmtree(job, ignore_errors=True)
+            job, status = self._wait(self._submit(simul))
+            if status['returncode'] == 0:
+                break
+        result = Result._from_output(job, os.path.join(job, 'model.bnd'),
+                                     os.path.join(job, 'model.cfg'),
+                                     simul.palette, compact=compact)
+        result._owns_path = True
+        result.timings['process'] = status['process']
+        if status['returncode']:
+            result._err = status['returncode']
+            if status.get('error'):
+                print("Error, job failed: %s" % status['error'],
+                      file=sys.stderr)
+            else:
+                print("Error, MaBoSS returned non 0 value%s"
+                      % (" (timeout)" if status['timed_out'] else ""),
+                      file=sys.stderr)
+        elif in_memory:
+            result._load_in_memory()
+        return result
+
+    def _submit(self, simul):
+        """Write the job of simul in the queue and return its name."""
+        name = uuid.uuid4().hex
+        new = os.path.join(self.spool, 'new', name)
+        os.mkdir(new)
+        bnd, cfg = io.StringIO(), io.StringIO()
+        simul.print_bnd(out=bnd)
+        simul.print_cfg(out=cfg)
+        _write_text(os.path.join(new, 'model.bnd'), bnd.getvalue())
+        _write_text(os.path.join(new, 'model.cfg'), cfg.getvalue())
+        _write_text(os.path.join(new, 'job.json'),
+                    json.dumps({'timeout': self.timeout}))
+        os.rename(new, os.path.join(self.spool, 'queue', name))
+        return name
+
+    def _wait(self, name):
+        """Wait for a job to be done and return its directory and status."""
+        job = os.path.join(self.spool, 'done', name)
+        running = os.path.join(self.spool, 'running', name)
+        started = None
+        while not os.path.isdir(job):
+            if self._workers and not any(w.is_alive() for w in self._workers):
+                raise RuntimeError("All the workers of %s have stopped"
+                                   % self.spool)
+            try:
+                beat = os.path.getmtime(running)
+            except FileNotFoundError:  # Still queued, or done meanwhile
+                beat = None
+            if beat is not None:
+                now = time.time()
+                started = started or now
+                if (now - beat > self.stale or self.timeout is not None
+                        and now - started > self.timeout + self.stale):
+                    shutil.rmtree(running, ignore_errors=True)
+                    if not os.path.isdir(job):
+                        error = "no news from the worker for %g s" % (
+                            now - min(beat, started))
+                        return job, {'returncode': -1, 'timed_out': True,
+                                     'process': now - started, 'host': None,
+                                     'error': error}
+            sleep(self.interval)
+        with open(os.path.join(job, 'status.json')) as status_file:
+            return job, json.load(status_file)
+
+    def close(self):
+        """Stop the workers started by this backend, once they have finished
+        their current job. A worker still running after the timeout of its
+        job is terminated, which kills MaBoSS too."""
+        stops = [os.path.join(self.spool, 'stop.' + worker.name)
+                 for worker in self._workers]
+        for stop in stops:
+            _write_text(stop, "")
+        for worker in self._workers:
+            worker.join((self.timeout or 0) + _grace)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+        for stop in stops:
+            os.remove(stop)
+        self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def spool_worker(spool, interval=0.05, name=None):
+    """
+    Run the jobs of a spool directory, until a ``stop`` file, or a
+    ``stop.<name>`` file if the worker has a name, is created in it.
+
+    :param str spool: the spool directory of a :py:class:`SpoolBackend`
+    :param float interval: the delay between two checks of the queue
+    :param str name: the name of the worker
+
+    A job that cannot be run, for instance because its files are missing,
+    is moved to ``done`` with the error in its ``status.json`` file.
+    """
+    queue = os.path.join(spool, 'queue')
+    stops = [os.path.join(spool, 'stop')]
+    if name is not None:
+        stops.append(os.path.join(spool, 'stop.' + name))
+    while not any(os.path.exists(stop) for stop in stops):
+        for job_name in sorted(os.listdir(queue)):
+            job = os.path.join(spool, 'running', job_name)
+            try:
+                os.rename(os.path.join(queue, job_name), job)
+            except FileNotFoundError:  # Taken by another worker
+                continue
+            try:
+                _run_job(job)
+            except Exception as e:
+                print("Error, job %s failed: %s" % (job_name, e),
+                      file=sys.stderr)
+                try:
+                    _write_status(job, 1, error="%s: %s"
+                                  % (type(e).__name__, e))
+                except OSError:  # Given up by the client
+                    pass
+            try:
+                os.rename(job, os.path.join(spool, 'done', job_name))
+            except FileNotFoundError:  # Given up by the client
+                pass
+            break
+        else:
+            sleep(interval)
+
+
+def _local_worker(spool, interval):
+    """Run spool_worker in a process started by a SpoolBackend, which
+    terminates it with SIGTERM as a last resort."""
+    signal.signal(signal.SIGTERM, _exit)
+    spool_worker(spool, interval, multiprocessing.current_process().name)
+
+
+def _exit(signum, frame):
+    # Unwinds _run_job, which kills MaBoSS
+    raise SystemExit(1)
+
+
+def _run_job(job):
+    os.utime(job)  # The job may have been queued for a long time
+    with open(os.path.join(job, 'job.json')) as job_file:
+        timeout = json.load(job_file)['timeout']
+    start = perf_counter()
+    timed_out = False
+    try:
+        process = subprocess.Popen(
+            ["MaBoSS", "-c", os.path.join(job, 'model.cfg'), "-o",
+             os.path.join(job, 'res'), os.path.join(job, 'model.bnd')])
+    except OSError as e:
+        print("Error, could not run MaBoSS: %s" % e, file=sys.stderr)
+        returncode = 127
+    else:
+        try:
+            while True:
+                left = _heartbeat
+                if timeout is not None:
+                    left = min(left, max(0, start + timeout - perf_counter()))
+                try:
+                    returncode = process.wait(left)
+                    break
+                except subprocess.TimeoutExpired:
+                    if (timeout is not None
+                            and perf_counter() >= start + timeout):
+                        timed_out = True
+                        break
+                    os.utime(job)  # Tell the client that the worker is alive
+        finally:
+            if process.poll() is None:
+                process.kill()
+                returncode = process.wait()
+    _write_status(job, returncode, timed_out, perf_counter() - start)
+
+
+def _write_status(job, returncode, timed_out=False, process=0.0, error=None):
+    status = {'returncode': returncode, 'timed_out': timed_out,
+              'process': process, 'host': platform.node()}
+    if error is not None:
+        status['error'] = error
+    _write_text(os.path.join(job, 'status.json'), json.dumps(status))
+
+
+_spool_dirs = ['new', 'queue', 'running', 'done']
+# The delay between two signs of life of a worker running MaBoSS
+_heartbeat = 1.0
+# The delay given to the workers to finish their job when they are stopped
+_grace = 5.0
+
+
+__all__ = ["LocalBackend", "SpoolBackend", "spool_worker"]
+
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, _exit)
+    spool_worker(sys.argv[1])
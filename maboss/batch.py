@@ -0,0 +1,153 @@
+"""Functions to run several MaBoSS simulations concurrently."""
+
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+
+class BatchResult(dict):
+    """
+    Results of a batch of simulations.
+
+    A BatchResult maps the key of each simulation to its :py:class:`Result`.
+
+    .. py:attribute:: errors
+
+      A dictionary that gives, for each simulation that failed, the error
+      that occured: either the exception raised while running it, or a
+      message if MaBoSS returned a non 0 value.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.errors = {}
+
+
+def run_simulations(simulations, max_workers=None, compact=False,
+                    cache=None, workdir=None, in_memory=False, backend=None):
+    """
+    Run several simulations in parallel and wait for all of them.
+
+    :param simulations: the simulations to run
+    :type simulations: a list or a dict of :py:class:`Simulation`
+    :param int max_workers: the number of cores that can be used at the same
+        time (defaults to the number of cores of the machine, or to the
+        capacity of the backend)
+    :param bool compact: passed to :py:meth:`Simulation.run`
+    :param cache: passed to :py:meth:`Simulation.run`
+    :type cache: :py:class:`ResultCache`
+    :param str workdir: passed to :py:meth:`Simulation.run`
+    :param bool in_memory: passed to :py:meth:`Simulation.run`
+    :param backend: passed to :py:meth:`Simulation.run`
+    :rtype: :py:class:`BatchResult`, indexed by the positions in the list, or
+        the keys of the dictionary
+    """
+    results = BatchResult()
+    for key, result, error in iter_simulations(simulations, max_workers,
+                                               compact, cache, workdir,
+                                               in_memory, backend):
+        if result is not None:
+            results[key] = result
+        if error is not None:
+            results.errors[key] = error
+    return results
+
+
+def iter_simulations(simulations, max_workers=None, compact=False,
+                     cache=None, workdir=None, in_memory=False, backend=None):
+    """
+    Run several simulations in parallel and yield them as they complete.
+
+    Takes the same arguments as :py:func:`run_simulations`, and yields tuples
+    ``(key, result, error)``, where ``error`` is None if the simulation
+    succeeded and ``result`` is None if the simulation could not be run.
+
+    Each simulation reserves as many cores as its ``thread_count`` parameter,
+    so that the number of MaBoSS threads running at the same time never
+    exceeds ``max_workers``.
+    """
+    items = _items(simulations)
+    if not items:
+        return
+    cores = (max_workers or getattr(backend, 'capacity', None)
+             or os.cpu_count() or 1)
+    budget = _CoreBudget(cores)
+
+    def run(key, simul):
+        needed = min(_thread_count(simul), cores)
+        budget.acquire(needed)
+        try:
+            result = simul.run(compact=compact, cache=cache,
+                               workdir=workdir, in_memory=in_memory,
+                               backend=backend)
+        except Exception as e:
+            return key, None, e
+        finally:
+            budget.release(needed)
+        if result._err:
+            return key, result, ("MaBoSS returned non 0 value (%d)"
+                                 % result._err)
+        return key, result, None
+
+    with ThreadPoolExecutor(max_workers=min(cores, len(items))) as executor:
+        # as_completed drops the futures it has yielded, so that the results
+        # are not kept alive after they have been consumed.
+        for future in as_completed([executor.submit(run, key, simul)
+                                    for key, simul in items]):
+            yield future.result()
+
+
+def timing_table(results):
+    """
+    Return the timings and the resource usage of several results.
+
+    :param results: the results, for instance a :py:class:`BatchResult`
+    :type results: a list or a dict of :py:class:`Result`
+    :rtype: pandas DataFrame, with one row per result and one column per
+        entry of :py:attr:`Result.timings` and :py:attr:`Result.usage`
+
+    **Example**
+
+    >>> timing_table(run_simulations(simulations)).describe()
+    """
+    return pd.DataFrame.from_dict(
+        {key: dict(result.timings, **result.usage)
+         for key, result in _items(results)}, orient='index')
+
+
+def _items(simulations):
+    if isinstance(simulations, dict):
+        return list(simulations.items())
+    return list(enumerate(simulations))
+
+
+def _thread_count(simul):
+    try:
+        return max(1, int(simul.param.get('thread_count', 1)))
+    except ValueError:
+        return 1
+
+
+class _CoreBudget(object):
+    """Counter of the cores that are not used by a running simulation."""
+
+    def __init__(self, cores):
+        self._free = cores
+        self._condition = threading.Condition()
+
+    def acquire(self, cores):
+        with self._condition:
+            self._condition.wait_for(lambda: self._free >= cores)
+            self._free -= cores
+
+    def release(self, cores):
+        with self._condition:
+            self._free += cores
+            self._condition.notify_all()
+
+
+__all__ = ["BatchResult", "run_simulations", "iter_simulations",
+           "timing_table"]
@@ -0,0 +1,213 @@
+"""On-disk cache of MaBoSS outputs, indexed by the content of the bnd and cfg
+files."""
+
+
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from sys import stderr
+
+from .result import Result
+
+
+class ResultCache(object):
+    """
+    Cache of MaBoSS outputs stored in a directory.
+
+    :param str path: the directory where the outputs are stored
+        (defaults to ``~/.cache/maboss``)
+    :param int max_size: the maximum size of the cache in bytes. When it is
+        exceeded, the least recently used outputs are removed.
+    :param bool cache_physrandgen: if False, simulations that use a physical
+        random generator (``use_physrandgen`` parameter) are not
+        reproducible and bypass the cache.
+
+    The key of a simulation is a hash of its bnd and cfg files and of the
+    version of MaBoSS. Running a simulation whose key is in the cache returns
+    a :py:class:`Result` that reads a private copy of the cached directory,
+    made of hard links when possible, so that the entry can be evicted while
+    the Result is in use.
+
+    **Example**
+
+    >>> cache = ResultCache(max_size=10**9)
+    >>> sim.update_parameters(use_physrandgen=0)
+    >>> res = sim.run(cache=cache)  # Runs MaBoSS
+    >>> res = sim.run(cache=cache)  # Reads the outputs of the first run
+    >>> cache.stats()
+    {'hits': 1, 'misses': 1, 'bypassed': 0, 'entries': 1, 'size': 1612}
+    """
+
+    def __init__(self, path=None, max_size=2**30, cache_physrandgen=False):
+        if path is None:
+            path = os.path.join(os.path.expanduser("~"), ".cache", "maboss")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.max_size = max_size
+        self.cache_physrandgen = cache_physrandgen
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def key(self, simul):
+        """Return the key of a simulation in the cache."""
+        bnd, cfg = io.StringIO(), io.StringIO()
+        simul.print_bnd(out=bnd)
+        simul.print_cfg(out=cfg)
+        digest = hashlib.sha256()
+        for text in (self._maboss_version(), bnd.getvalue(), cfg.getvalue()):
+            digest.update(text.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def run(self, simul, compact=False, workdir=None, in_memory=False,
+            backend=None):
+        """Return the Result of simul, running MaBoSS only on a cache miss.
+
+        :param simul: the simulation to run
+        :type simul: :py:class:`Simulation`
+        :param bool compact: passed to :py:class:`Result`
+        :param str workdir: passed to :py:class:`Result`
+        :param bool in_memory: passed to :py:class:`Result`, the cached
+            output is then parsed and not read from the cache afterwards
+        :param backend: passed to :py:meth:`Simulation.run`
+        :rtype: :py:class:`Result`
+        """
+        if (not self.cache_physrandgen
+                and _to_int(simul.param.get('use_physrandgen', 0))):
+            with self._lock:
+                self.bypassed += 1
+            return simul.run(compact=compact, workdir=workdir,
+                             in_memory=in_memory, backend=backend)
+
+        entry = os.path.join(self.path, self.key(simul))
+        result = self._hit(entry, simul.palette, compact, workdir)
+        if result is not None:
+            with self._lock:
+                self.hits += 1
+        else:
+            with self._lock:
+                self.misses += 1
+            result = simul.run(compact=compact, workdir=workdir,
+                               backend=backend)
+            if result._err:
+                return result
+            self._store(result, entry)
+        if in_memory:
+            result._load_in_memory()
+        return result
+
+    def stats(self):
+        """Return the number of hits, misses and bypassed simulations, the
+        number of entries and the size of the cache."""
+        entries = self._entries()
+        return {'hits': self.hits, 'misses': self.misses,
+                'bypassed': self.bypassed, 'entries': len(entries),
+                'size': sum(size for _, _, size in entries)}
+
+    def clear(self):
+        """Remove all the entries of the cache."""
+        for entry, _, _ in self._entries():
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def _hit(self, entry, palette, compact, workdir):
+        """Return a Result reading a copy of entry, or None if entry is not
+        in the cache."""
+        if not os.path.isdir(entry):
+            return None
+        try:
+            os.utime(entry)  # Most recently used
+            return _cached_result(entry, palette, compact, workdir)
+        except FileNotFoundError:  # Evicted concurrently
+            return None
+
+    def _store(self, result, entry):
+        tmp_entry = tempfile.mkdtemp(dir=self.path, prefix=".tmp")
+        shutil.copy(result._bnd, os.path.join(tmp_entry, "model.bnd"))
+        shutil.copy(result._cfg, os.path.join(tmp_entry, "model.cfg"))
+        for f in os.listdir(result._path):
+            if f.startswith('res'):
+                shutil.copy(os.path.join(result._path, f), tmp_entry)
+        try:
+            os.rename(tmp_entry, entry)
+        except OSError:  # Stored concurrently by another run
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+        self._evict(keep=entry)
+
+    def _evict(self, keep):
+        """Remove the least recently used entries until the cache fits in
+        max_size."""
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        size = sum(e[2] for e in entries)
+        for entry, _, entry_size in entries:
+            if size <= self.max_size:
+                break
+            if entry != keep:
+                shutil.rmtree(entry, ignore_errors=True)
+                size -= entry_size
+
+    def _entries(self):
+        """Return the path, the last use and the size of every entry."""
+        entries = []
+        for name in os.listdir(self.path):
+            entry = os.path.join(self.path, name)
+            if name.startswith('.') or not os.path.isdir(entry):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(entry, f))
+                           for f in os.listdir(entry))
+                entries.append((entry, os.path.getmtime(entry), size))
+            except FileNotFoundError:  # Evicted concurrently
+                pass
+        return entries
+
+    def _maboss_version(self):
+        if self._version is None:
+            try:
+                self._version = subprocess.run(
+                    ["MaBoSS", "--version"], stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT, universal_newlines=True).stdout
+            except OSError as e:
+                print("Warning, could not get MaBoSS version: %s" % e,
+                      file=stderr)
+                self._version = ""
+        return self._version
+
+
+def _cached_result(entry, palette, compact, workdir=None):
+    """Return a Result owning a copy of entry, in workdir or next to entry."""
+    path = tempfile.mkdtemp(dir=workdir or os.path.dirname(entry),
+                            prefix=".hit")
+    try:
+        for f in os.listdir(entry):
+            source, target = os.path.join(entry, f), os.path.join(path, f)
+            try:
+                os.link(source, target)
+            except FileNotFoundError:
+                raise
+            except OSError:  # Other file system
+                shutil.copy(source, target)
+    except BaseException:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    result = Result._from_output(path, os.path.join(path, "model.bnd"),
+                                 os.path.join(path, "model.cfg"), palette,
+                                 compact=compact)
+    result._owns_path = True
+    return result
+
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except ValueError:
+        return 1
+
+
+__all__ = ["ResultCache"]
@@ -5,6 +5,7 @@ the very specific structure of the ginsim output and not able to parse every
 MaBoSS file.
 """
 
+import re
 import sys
 from sys import stderr
 from os.path import isfile
@@ -129,28 +130,24 @@ def _read_cfg(string):
         is_internal_list = {}
         istate_list = {}
         refstate_list = {}
-        parse_cfg = cfg_grammar.parseString(string)
-        for token in parse_cfg:
-            if token.lhs:  # True if token is var_decl
-                variables[token.lhs] = token.rhs
-            if token.is_internal_val:  # True if token is internal_decl
-                is_internal_list[token.node] = token.is_internal_val
-            if token.refstate_val:
-                refstate_list[token.node] = token.refstate_val
-            if token.param:  # True if token is param_decl
-                parameters[token.param] = float(token.value)
-            if token.nd_i:
-                istate_list[token.nd_i] = {0: 1 - int(token.istate_val),
-                                           1: int(token.istate_val)}
-            if token.attrib:  # True if token is istate_decl
+        for kind, lhs, rhs in _parse_cfg(string):
+            if kind == 'var':
+                variables[lhs] = rhs
+            elif kind == 'internal':
+                is_internal_list[lhs] = rhs
+            elif kind == 'refstate':
+                refstate_list[lhs] = rhs
+            elif kind == 'param':
+                parameters[lhs] = float(rhs)
+            elif kind == 'one_istate':
+                istate_list[lhs] = {0: 1 - int(rhs), 1: int(rhs)}
+            elif kind == 'istate':
                 # TODO check if lens are consistent
-                if len(token.nodes) == 1:
-                    istate_list[token.nodes[0]] = {int(t[1][0]): t[0]
-                                                   for t in token.attrib}
+                if len(lhs) == 1:
+                    istate_list[lhs[0]] = {int(t[1][0]): t[0] for t in rhs}
                 else:
-                    nodes = tuple(token.nodes)
-                    istate_list[nodes] = {tuple(t[1]): t[0]
-                                          for t in token.attrib}
+                    istate_list[tuple(lhs)] = {tuple(t[1]): t[0]
+                                               for t in rhs}
 
         return (variables, parameters, is_internal_list, istate_list,
                 refstate_list)
@@ -158,16 +155,189 @@ def _read_cfg(string):
 
 def _read_bnd(string, is_internal_list):
         nodes = []
-        parse_bnd = bnd_grammar.parseString(string)
-        for token in parse_bnd:
-            interns = {v.lhs: v.rhs for v in token.interns}
+        for name, interns in _parse_bnd(string):
             logic = interns.pop('logic') if 'logic' in interns else None
             rate_up = interns.pop('rate_up')
             rate_down = interns.pop('rate_down')
 
-            internal = (is_internal_list[token.name]
-                        if token.name in is_internal_list
+            internal = (is_internal_list[name]
+                        if name in is_internal_list
                         else False)
-            nodes.append(Node(token.name, logic, rate_up, rate_down,
+            nodes.append(Node(name, logic, rate_up, rate_down,
                               internal, interns))
         return nodes
+
+
+# ==============================
+# Fast parsing of bnd and cfg
+# ==============================
+# The pyparsing grammars above are slow on large models. The files are
+# first read by the scanners below, that only accept a strict subset of the
+# grammars, and give up (by raising _Unsupported) on anything else: comments
+# inside a declaration, names rejected by varName, syntax errors... The
+# pyparsing grammars are then used instead, so that the results and the
+# error messages are the same as before.
+
+class _Unsupported(Exception):
+    pass
+
+
+_blank = re.compile(r'(?:\s+|//[^\n]*)*')
+_name = re.compile(r'[A-Za-z][A-Za-z0-9_]*')
+_reserved = ('AND', 'OR', 'XOR', 'NOT', 'True', 'False', 'Node')
+_node_keyword = re.compile(r'node(?![A-Za-z0-9_$])', re.IGNORECASE)
+_float = re.compile(r'[0-9.Ee+-]+')
+_var_decl = re.compile(r'\$(\w+)\s*=\s*(.*)', re.DOTALL)
+_istate_decl = re.compile(r'\[([^\]]*)\]\.istate\s*=\s*(.*)', re.DOTALL)
+_param_decl = re.compile(r'(\w+)\s*=\s*(\S+)\s*$')
+_dot_decl = re.compile(r'(\w+)\.(is_internal|istate|refstate)\s*=\s*(\S+)\s*$')
+_state_prob = re.compile(r'\s*([0-9.Ee+-]+)\s*\[([0-9,\s]*)\]\s*(,|$)')
+_dot_kinds = {'is_internal': 'internal', 'istate': 'one_istate',
+              'refstate': 'refstate'}
+
+
+def _parse_bnd(string):
+    """Return the list of (name, {variable: expression}) of the nodes."""
+    try:
+        return _scan_bnd(string)
+    except _Unsupported:
+        return [(token.name, {v.lhs: v.rhs for v in token.interns})
+                for token in bnd_grammar.parseString(string)]
+
+
+def _parse_cfg(string):
+    """Return the list of (kind, lhs, rhs) of the cfg declarations."""
+    try:
+        return _scan_cfg(string)
+    except _Unsupported:
+        return [_cfg_token(token) for token in cfg_grammar.parseString(string)]
+
+
+def _cfg_token(token):
+    if token.lhs:
+        return 'var', token.lhs, token.rhs
+    if token.attrib:
+        return 'istate', list(token.nodes), [(t[0], list(t[1]))
+                                             for t in token.attrib]
+    if token.param:
+        return 'param', token.param, token.value
+    if token.is_internal_val:
+        return 'internal', token.node, token.is_internal_val
+    if token.nd_i:
+        return 'one_istate', token.nd_i, token.istate_val
+    return 'refstate', token.node, token.refstate_val
+
+
+def _scan_bnd(string):
+    nodes = []
+    pos = _blank.match(string).end()
+    while pos < len(string):
+        keyword = _node_keyword.match(string, pos)
+        if not keyword:
+            raise _Unsupported()
+        name, pos = _scan_name(string, _blank.match(string, keyword.end()).end())
+        pos = _blank.match(string, pos).end()
+        if not string.startswith('{', pos):
+            raise _Unsupported()
+        pos = _blank.match(string, pos + 1).end()
+        interns = {}
+        while not string.startswith('}', pos):
+            lhs, pos = _scan_name(string, pos)
+            pos = _blank.match(string, pos).end()
+            if not string.startswith('=', pos):
+                raise _Unsupported()
+            pos = _blank.match(string, pos + 1).end()
+            end = string.find(';', pos)
+            if end < 0 or '//' in string[pos:end]:
+                raise _Unsupported()
+            interns[lhs] = string[pos:end]
+            pos = _blank.match(string, end + 1).end()
+        if not interns:
+            raise _Unsupported()
+        nodes.append((name, interns))
+        pos = _blank.match(string, pos + 1).end()
+    if not nodes:
+        raise _Unsupported()
+    return nodes
+
+
+def _scan_cfg(string):
+    decls = []
+    pos = _blank.match(string).end()
+    while pos < len(string):
+        end = string.find(';', pos)
+        if end < 0 or '//' in string[pos:end]:
+            raise _Unsupported()
+        decls.append(_scan_cfg_decl(string[pos:end]))
+        pos = _blank.match(string, end + 1).end()
+    return decls
+
+
+def _scan_cfg_decl(decl):
+    match = _var_decl.match(decl)
+    if match:
+        return 'var', _check_name(match.group(1)), match.group(2)
+    match = _istate_decl.match(decl)
+    if match:
+        nodes = [_check_name(nd.strip()) for nd in match.group(1).split(',')]
+        return 'istate', nodes, _scan_state_probs(match.group(2))
+    match = _param_decl.match(decl)
+    if match:
+        value = match.group(2)
+        if _float.fullmatch(value):
+            value = _to_float(value)
+        else:
+            value = _scan_boolean(value)
+        return 'param', _check_name(match.group(1)), value
+    match = _dot_decl.match(decl)
+    if match:
+        return (_dot_kinds[match.group(2)], _check_name(match.group(1)),
+                _scan_boolean(match.group(3)))
+    raise _Unsupported()
+
+
+def _scan_state_probs(string):
+    attrib = []
+    pos = 0
+    while True:
+        match = _state_prob.match(string, pos)
+        if not match or not match.group(2).strip():
+            raise _Unsupported()
+        try:
+            states = [int(b) for b in match.group(2).split(',')]
+        except ValueError:
+            raise _Unsupported()
+        attrib.append((_to_float(match.group(1)), states))
+        pos = match.end()
+        if not match.group(3):
+            return attrib
+
+
+def _scan_name(string, pos):
+    match = _name.match(string, pos)
+    if not match:
+        raise _Unsupported()
+    return _check_name(match.group()), match.end()
+
+
+def _check_name(name):
+    if not _name.fullmatch(name) or name.startswith(_reserved):
+        raise _Unsupported()
+    return name
+
+
+def _scan_boolean(value):
+    if value in ('0', '1'):
+        return value
+    if value.lower() == 'true':
+        return '1'
+    if value.lower() == 'false':
+        return '0'
+    raise _Unsupported()
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        raise _Unsupported()
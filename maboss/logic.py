@@ -2,6 +2,8 @@
 
 
 from sys import stderr
+import functools
+from string import ascii_letters, digits
 import pyparsing as pp
 
 logExp = pp.Forward()
@@ -22,9 +24,134 @@ logOr = logAnd + pp.ZeroOrMore(boolOr + logAnd)
 logExp << pp.Combine(logOr + pp.ZeroOrMore(boolXor + logOr), adjacent=False, joinString=' ')
 
 
+# ====================
+# Parsing with an AST
+# ====================
+# The pyparsing grammar above is kept for gsparser, but the expressions are
+# parsed by the recursive descent parser below, which accepts exactly the
+# same language. Operators and constants are matched as prefixes, like the
+# pyparsing literals, and a variable name cannot start with a reserved word.
+# The AST is made of tuples:
+#   ('var', name), ('cst', bool), ('not', e), ('and', e1, e2, ...),
+#   ('or', e1, e2, ...), ('xor', e1, e2, ...)
+
+_whitespace = " \t\n\r"
+_operators = {'and': ("&&", "&", "AND"), 'or': ("||", "|", "OR"),
+              'xor': ("^", "XOR")}
+_not = ("!", "NOT")
+_constants = {"True": True, "False": False}
+_reserved = ("AND", "OR", "XOR", "NOT", "True", "False", "Node")
+_name_start = frozenset(ascii_letters)
+_name_chars = frozenset(ascii_letters + digits + '_')
+
+
+class _SyntaxError(Exception):
+    pass
+
+
+class _Parser(object):
+    """Recursive descent parser of a boolean expression."""
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+        self.variables = []
+
+    def parse(self):
+        ast = self.expression()
+        self.skip()
+        if self.pos != len(self.text):
+            raise _SyntaxError()
+        return ast
+
+    def skip(self):
+        while self.pos < len(self.text) and self.text[self.pos] in _whitespace:
+            self.pos += 1
+
+    def literal(self, literals):
+        """Consume and return the first of literals found at pos, if any."""
+        self.skip()
+        for lit in literals:
+            if self.text.startswith(lit, self.pos):
+                self.pos += len(lit)
+                return lit
+        return None
+
+    def expression(self):
+        return self.operation('xor', lambda: self.operation('or', lambda:
+                              self.operation('and', self.term)))
+
+    def operation(self, kind, operand):
+        operands = [operand()]
+        while True:
+            start = self.pos
+            if self.literal(_operators[kind]) is None:
+                break
+            try:
+                operands.append(operand())
+            except _SyntaxError:
+                self.pos = start  # ZeroOrMore stops before the operator
+                break
+        return operands[0] if len(operands) == 1 else (kind,) + tuple(operands)
+
+    def term(self):
+        negated = self.literal(_not) is not None
+        self.skip()
+        cst = self.literal(_constants)
+        if cst is not None:
+            ast = ('cst', _constants[cst])
+        elif self.literal("(") is not None:
+            ast = self.expression()
+            if self.literal(")") is None:
+                raise _SyntaxError()
+        else:
+            ast = ('var', self.name())
+        return ('not', ast) if negated else ast
+
+    def name(self):
+        start = self.pos
+        if (start >= len(self.text) or self.text[start] not in _name_start
+                or self.text.startswith(_reserved, start)):
+            raise _SyntaxError()
+        self.pos += 1
+        while self.pos < len(self.text) and self.text[self.pos] in _name_chars:
+            self.pos += 1
+        name = self.text[start:self.pos]
+        if name not in self.variables:
+            self.variables.append(name)
+        return name
+
+
+@functools.lru_cache(maxsize=65536)
+def _analyse(string):
+    parser = _Parser(string)
+    try:
+        ast = parser.parse()
+    except _SyntaxError:
+        return None
+    return ast, tuple(parser.variables)
+
+
+def parse(string):
+    """Return the AST of a boolean expression, None if it is not
+    syntaxically correct.
+
+    The result is cached, so each expression is only parsed once.
+    """
+    analysis = _analyse(string)
+    return analysis[0] if analysis else None
+
+
+def variables(string):
+    """Return the frozenset of the variables of a boolean expression, None if
+    it is not syntaxically correct."""
+    analysis = _analyse(string)
+    return frozenset(analysis[1]) if analysis else None
+
+
 def _check_logic_syntax(string):
     """Return True iff string is a syntaxically correct boolean expression."""
-    return logExp.matches(string)
+    return _analyse(string) is not None
 
 
 def _check_logic_defined(name_list, logic_list):
@@ -33,25 +160,15 @@ def _check_logic_defined(name_list, logic_list):
     Return True iff all expression in logic_list are syntaxically correct and
     all contains only variables present in name_list.
     """
-    _check_logic_defined.failed = False
-
-    # We modify the behaviour of boolExp.parseString so that the parsing also
-    # check if variables exist.
-    def check_var(var):
-        if var[0] not in name_list:
-            print("Error: unkown variable %s" % var[0], file=stderr)
-            _check_logic_defined.failed = True
-        return var
-
-    varName.setParseAction(check_var)
-
+    names = set(name_list)
     for string in logic_list:
-        if not _check_logic_syntax(string):
+        analysis = _analyse(string)
+        if analysis is None:
             print("Error: syntax error %s" % string, file=stderr)
             return False
-        if _check_logic_defined.failed:
-            varName.setParseAction(lambda x: x)
+        unknown = [var for var in analysis[1] if var not in names]
+        if unknown:
+            for var in unknown:
+                print("Error: unkown variable %s" % var, file=stderr)
             return False
-
-    varName.setParseAction(lambda x: x)
     return True
@@ -2,6 +2,14 @@
 
 from . import logic
 from sys import stderr, stdout
+import io
+import itertools
+import weakref
+
+# Each modification of a node gives it a new version, unique among all nodes.
+_versions = itertools.count()
+# The attributes of a node that appear in the bnd file
+_bnd_attributes = {'name', 'logExp', 'rt_up', 'rt_down', 'internal_var'}
 
 
 class Node(object):
@@ -52,6 +60,20 @@ class Node(object):
         self.internal_var = internal_var.copy()
         self.is_mutant=is_mutant
 
+    def __setattr__(self, name, value):
+        borrowers = self.__dict__.get('_borrowers')
+        if borrowers and not name.startswith('_'):
+            # The copies of the network sharing this node keep its old value
+            object.__setattr__(self, '_borrowers', None)
+            for ref in borrowers:
+                network = ref()
+                if network is not None:
+                    network._detach(self)
+        super().__setattr__(name, value)
+        if name in _bnd_attributes:
+            super().__setattr__('_version', next(_versions))
+            super().__setattr__('_text', None)
+
     def set_rate(self, rate_up, rate_down):
         """
         Set the value of rate_up and rate_down.
@@ -74,7 +96,7 @@ class Node(object):
         """
         if not string:
             self.logExp = None
-        if logic._check_logic_syntax(string):
+        elif logic._check_logic_syntax(string):
             self.logExp = string
         else:
             print("Warning, syntax error: %s" % string, file=stderr)
@@ -85,8 +107,31 @@ class Node(object):
         return _strNode(self)
 
     def copy(self):
-        return Node(self.name, self.logExp, self.rt_up, self.rt_down,
-                    self.is_internal, self.internal_var, self.is_mutant)
+        new_node = Node(self.name, self.logExp, self.rt_up, self.rt_down,
+                        self.is_internal, self.internal_var, self.is_mutant)
+        # Same content, so the copy can keep the version and the cached text
+        object.__setattr__(new_node, '_version', self._version)
+        object.__setattr__(new_node, '_text', self._text)
+        return new_node
+
+    def _lend(self, network):
+        """Record that network shares this node without owning it."""
+        if self.__dict__.get('_borrowers') is None:
+            object.__setattr__(self, '_borrowers', [])
+        self._borrowers.append(weakref.ref(network))
+
+    def _return(self, network):
+        """Record that network does not share this node anymore."""
+        borrowers = self.__dict__.get('_borrowers')
+        if borrowers:
+            object.__setattr__(self, '_borrowers', [
+                ref for ref in borrowers
+                if ref() is not None and ref() is not network])
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_borrowers', None)
+        return state
 
 
 class Network(dict):
@@ -97,6 +142,12 @@ class Network(dict):
     present in the list.
     
     Network objects are in charge of carrying the initial states of each node.
+
+    Copies of a network share their Node objects, until a node is accessed
+    from the copy with ``network[name]``, ``get``, ``values`` or ``items``:
+    the node is then copied, so that modifying it does not affect the other
+    networks. The original network keeps its nodes, and when one of them is
+    modified the copies sharing it get its previous value.
     """
 
     def __init__(self, nodeList):
@@ -116,13 +167,73 @@ class Network(dict):
         # probabilities.
         self._initState = {l: {0: 0.5, 1: 0.5} for l in self._attribution}
 
+        # _shared contains the names of the nodes shared with the network
+        # this one was copied from.
+        self._shared = set()
+
     def copy(self):
-        new_ndList = [self[name].copy() for name in self.names]
-        new_network = Network(new_ndList)
+        new_network = Network.__new__(Network)
+        dict.__init__(new_network, self)
+        new_network.names = self.names.copy()
+        new_network.logicExp = self.logicExp.copy()
         new_network._attribution = self._attribution.copy()
         new_network._initState = self._initState.copy()
+        # The logic has already been checked, and the nodes are only copied
+        # when the new network gives access to them, or when they are
+        # modified by a network owning them.
+        new_network._shared = set(self)
+        for node in self._nodes():
+            node._lend(new_network)
         return new_network
 
+    def __getitem__(self, name):
+        node = super().__getitem__(name)
+        if name in self._shared:
+            node = self._unshare(name, node.copy())
+        return node
+
+    def __setitem__(self, name, node):
+        if name in self._shared:
+            self._unshare(name, node)
+        else:
+            super().__setitem__(name, node)
+
+    def _detach(self, node):
+        """Give this network its own copy of a shared node, before the node
+        is modified by a network owning it."""
+        if node.name in self._shared and super().get(node.name) is node:
+            self._unshare(node.name, node.copy())
+
+    def _unshare(self, name, node):
+        super().__getitem__(name)._return(self)
+        self._shared.discard(name)
+        super().__setitem__(name, node)
+        return node
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def values(self):
+        return [self[name] for name in self]
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+    def _peek(self, name):
+        """Return a node without copying it, it must not be modified."""
+        return super().__getitem__(name)
+
+    def _nodes(self):
+        """Return the nodes without copying them, they must not be
+        modified."""
+        return dict.values(self)
+
+    def _bnd_key(self):
+        """Return a value that changes whenever the bnd representation of the
+        network may have changed."""
+        return tuple((nd._version, tuple(nd.internal_var.items()))
+                     for nd in self._nodes())
+
     def set_istate(self, nodes, probDict):
         """
         Change the inital states probability of one or several nodes.
@@ -189,8 +300,18 @@ class Network(dict):
         return _strNetwork(self)
 
 
+    def print_bnd(self, out=stdout):
+        """Write the bnd representation of the network in out.
+
+        The text of each node is cached, and only rendered again for the
+        nodes that have been modified.
+        """
+        _writeNetwork(self, out)
+        out.write('\n')
+
     def print_istate(self, out=stdout):
-        print(_str_istateList(self._initState), file=out)
+        _write_istateList(self._initState, out)
+        out.write('\n')
 
     def set_output(self, output_list):
         """Set all the nodes that are not in the output_list as internal.
@@ -216,7 +337,7 @@ def _testStateDict(stDict, nbState):
         print("Error, the given values must be nonegative",
               file=stderr)
         return False
-    elif not sum(stDict.values()) == 1:
+    elif abs(sum(stDict.values()) - 1) > 1e-9:  # Rounding errors
         print("Warning: the given values should sum up to 1",
               file=stderr)
         return True
@@ -225,42 +346,56 @@ def _testStateDict(stDict, nbState):
 
 
 def _strNode(nd):
-    string = ""
-    rt_up_str = str(nd.rt_up)
-    rt_down_str = str(nd.rt_down)
-    internal_var_decl = "\n".join(map(lambda v: v+" = " + nd.internal_var[v],
-                                      nd.internal_var.keys()))
-    string = "\n".join(["Node " + nd.name + " {",
-                        internal_var_decl,
-                        ("\tlogic = " + nd.logExp + ";") if nd.logExp else "",
-                        ("\trate_up = " + rt_up_str + ";"),
-                        ("\trate_down = " + rt_down_str + ";"),
-                        "}"])
-    return string
+    """Return the bnd text of a node, rendered again only if it changed."""
+    key = (nd._version, tuple(nd.internal_var.items()))
+    if nd._text is None or nd._text[0] != key:
+        # A cache, not a modification of the node
+        object.__setattr__(nd, '_text', (key, _renderNode(nd)))
+    return nd._text[1]
+
+
+def _renderNode(nd):
+    internal_var_decl = "\n".join(v + " = " + nd.internal_var[v]
+                                  for v in nd.internal_var)
+    return "\n".join(["Node " + nd.name + " {",
+                      internal_var_decl,
+                      ("\tlogic = " + nd.logExp + ";") if nd.logExp else "",
+                      "\trate_up = " + str(nd.rt_up) + ";",
+                      "\trate_down = " + str(nd.rt_down) + ";",
+                      "}"])
+
+
+def _writeNetwork(nt, out):
+    """Write the nodes of nt in out, separated like in _strNetwork."""
+    for i, nd in enumerate(nt._nodes()):
+        if i > 0:
+            out.write("\n" if i == 1 else "\n\n")
+        out.write(_strNode(nd))
 
 
 def _strNetwork(nt):
-    ndList = list(nt.values())
-    string = _strNode(ndList[0])
-    if len(ndList) > 1:
-        string += "\n"
-        string += "\n\n".join(_strNode(nd) for nd in ndList[1:])
-    return string
+    string = io.StringIO()
+    _writeNetwork(nt, string)
+    return string.getvalue()
 
 
-def _str_istateList(isl):
-    stringList = []
-    for binding in isl:
-        string = ''
+def _write_istateList(isl, out):
+    for i, binding in enumerate(isl):
+        if i > 0:
+            out.write('\n')
         if isinstance(binding, tuple):
-            string += '[' + ", ".join(list(binding)) + '].istate = '
-            string += ' , '.join([str(isl[binding][t]) + ' '
-                                  + str(list(t)) for t in isl[binding]])
-            string += ';'
+            out.write('[' + ", ".join(binding) + '].istate = ')
+            out.write(' , '.join(
+                str(prob) + ' [' + ', '.join(map(str, t)) + ']'
+                for t, prob in isl[binding].items()))
+            out.write(';')
         else:
-            string += '[' + binding + '].istate = '
-            string += str(isl[binding][0]) + '[0] , '
-            string += str(isl[binding][1]) + '[1];'
-        stringList.append(string)
-    return '\n'.join(stringList)
+            out.write('[' + binding + '].istate = '
+                      + str(isl[binding][0]) + '[0] , '
+                      + str(isl[binding][1]) + '[1];')
+
 
+def _str_istateList(isl):
+    string = io.StringIO()
+    _write_istateList(isl, string)
+    return string.getvalue()
@@ -0,0 +1,274 @@
+"""Functions to run a simulation several times with different seeds, and to
+merge the results."""
+
+
+import copy
+import io
+import math
+from sys import stderr
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from .batch import iter_simulations
+from .result import Result, ProbTraj
+
+
+def merge_results(results, sample_counts=None):
+    """
+    Merge the results of independent runs of the same simulation.
+
+    :param results: the results to merge, run with different seeds
+    :type results: a list of :py:class:`Result`
+    :param sample_counts: the number of trajectories of each result, used to
+        weight its probabilities (defaults to the same weight for all)
+    :rtype: :py:class:`Result`, whose tables are in memory, with the standard
+        errors given by :py:meth:`Result.get_nodes_error` and
+        :py:meth:`Result.get_states_error`
+
+    The standard error of a probability is estimated from its dispersion
+    among the results: its square is the weighted variance of the results
+    divided by their number minus one.
+
+    Results of failed runs are left out, with a warning. A ``ValueError`` is
+    raised if no result is left.
+    """
+    merger = _Merger()
+    for i, result in enumerate(results):
+        if result._err:
+            print("Warning, result %d left out of the merge: MaBoSS returned "
+                  "%s" % (i, result._err), file=stderr)
+            continue
+        merger.add(result, 1 if sample_counts is None else sample_counts[i])
+    return merger.result()
+
+
+def run_adaptive(simul, target_error=0.01, batch_size=None, max_samples=None,
+                 min_batches=2, max_workers=None, compact=False):
+    """
+    Run a simulation in batches until its node probabilities are precise
+    enough.
+
+    Each batch is a run of `simul` with its own ``seed_pseudorandom`` and
+    ``batch_size`` trajectories. Batches are added until the standard error
+    of every node probability at the last time point is below
+    `target_error`. The standard error is estimated from the dispersion of
+    the batches, and the number of batches of each round is chosen from the
+    error of the previous one.
+
+    :param simul: the simulation to run
+    :type simul: :py:class:`Simulation`
+    :param float target_error: the standard error to reach
+    :param int batch_size: the ``sample_count`` of each batch (defaults to
+        the ``sample_count`` of `simul`)
+    :param int max_samples: stop once this number of trajectories is reached
+        (defaults to 100 batches)
+    :param int min_batches: the number of batches of the first round, at
+        least 2
+    :param int max_workers: passed to :py:func:`run_simulations`
+    :param bool compact: passed to :py:meth:`Simulation.run`
+    :rtype: :py:class:`Result`, see :py:func:`merge_results`
+    """
+    if batch_size is None:
+        batch_size = int(simul.param['sample_count'])
+    if max_samples is None:
+        max_samples = 100 * batch_size
+    merger = _Merger()
+    seeds = _seeds(simul)
+    needed = max(2, min_batches)
+    while True:
+        needed = min(needed, max(1, (max_samples - merger.samples)
+                                 // batch_size))
+        _run_batches(simul, [next(seeds) for _ in range(needed)], batch_size,
+                     merger, max_workers, compact)
+        error = merger.last_error()
+        if error <= target_error:
+            break
+        if merger.samples + batch_size > max_samples:
+            print("Warning, standard error %g above %g after %d samples"
+                  % (error, target_error, merger.samples), file=stderr)
+            break
+        # The standard error decreases as the square root of the samples
+        target = merger.samples * (error / target_error) ** 2
+        needed = math.ceil((target - merger.samples) / batch_size)
+    return merger.result(simul)
+
+
+def run_replicates(simul, replicates=10, max_workers=None, compact=False):
+    """
+    Run a simulation several times with different seeds, and merge the
+    results.
+
+    The replicates run in parallel, each with its own ``seed_pseudorandom``
+    and the ``sample_count`` of `simul`. Each replicate is merged as soon as
+    it completes and is then released, so that only one copy of the tables
+    is kept.
+
+    :param simul: the simulation to run
+    :type simul: :py:class:`Simulation`
+    :param int replicates: the number of runs
+    :param int max_workers: passed to :py:func:`run_simulations`
+    :param bool compact: passed to :py:meth:`Simulation.run`
+    :rtype: :py:class:`Result`, with the means of the replicates and the
+        standard errors given by :py:meth:`Result.get_nodes_error` and
+        :py:meth:`Result.get_states_error`
+    """
+    merger = _Merger()
+    seeds = _seeds(simul)
+    _run_batches(simul, [next(seeds) for _ in range(replicates)],
+                 int(simul.param['sample_count']), merger, max_workers,
+                 compact)
+    return merger.result(simul)
+
+
+def _run_batches(simul, seeds, batch_size, merger, max_workers, compact):
+    simul._get_bnd_file()  # Written once, shared by the copies below
+    variants = {}
+    for seed in seeds:
+        variants[seed] = copy.copy(simul)
+        variants[seed].param = simul.param.copy()
+        variants[seed].update_parameters(sample_count=batch_size,
+                                         seed_pseudorandom=seed)
+    for seed, result, error in iter_simulations(variants, max_workers,
+                                                compact, in_memory=True):
+        if error is not None:
+            raise RuntimeError("Batch with seed %d failed: %s"
+                               % (seed, error))
+        merger.add(result, batch_size)
+
+
+def _seeds(simul):
+    seed = int(simul.param.get('seed_pseudorandom', 0))
+    while True:
+        yield seed
+        seed += 1
+
+
+class _Merger(object):
+    """Weighted sums of the probabilities of several results.
+
+    The results are added one at a time, and only the sums are kept: the
+    state probabilities and their squares as sparse matrices, and the node
+    probabilities and their squares as tables, from which the means and the
+    standard errors are computed.
+    """
+
+    def __init__(self):
+        self.samples = 0
+        self.count = 0
+        self._time_points = None
+        self._states = {}
+        self._matrix = None
+        self._matrix_squares = None
+        self._nodes = None
+        self._squares = None
+        self._fixpoints = {}
+        self._fp_columns = None
+
+    def add(self, result, samples):
+        probtraj = result._get_probtraj()
+        if self._time_points is None:
+            self._time_points = probtraj.time_points
+            empty = sp.csr_matrix((len(self._time_points), 0))
+            self._matrix, self._matrix_squares = empty, empty.copy()
+            self._dtype = result._dtype()
+            self._compact = result._compact
+            self._palette = result.palette
+            self._model_text = result._model_text()
+            self._fp_columns = result.get_fptable().columns
+        elif not np.array_equal(probtraj.time_points, self._time_points):
+            raise ValueError("Results with different time points cannot be "
+                             "merged")
+        columns = np.array([self._states.setdefault(state, len(self._states))
+                            for state in probtraj.states], dtype=np.intp)
+        self._matrix = self._add_matrix(self._matrix, probtraj.matrix,
+                                        columns, samples)
+        self._matrix_squares = self._add_matrix(
+            self._matrix_squares, probtraj.matrix.power(2), columns, samples)
+
+        nodes = probtraj.nodes_table()
+        if self._nodes is None:
+            self._nodes = nodes * samples
+            self._squares = nodes ** 2 * samples
+        else:
+            self._nodes = self._nodes.add(nodes * samples, fill_value=0)
+            self._squares = self._squares.add(nodes ** 2 * samples,
+                                              fill_value=0)
+
+        fixpoints = result.get_fptable()
+        for _, row in fixpoints.iterrows():
+            weight, first_row = self._fixpoints.get(row['State'], (0, row))
+            self._fixpoints[row['State']] = (
+                weight + row['Proba'] * samples, first_row)
+        self.samples += samples
+        self.count += 1
+
+    def _add_matrix(self, total, matrix, columns, samples):
+        """Add samples * matrix, whose columns are at the given positions,
+        to total."""
+        total.resize((len(self._time_points), len(self._states)))
+        return total + sp.csr_matrix(
+            (matrix.data * float(samples), columns[matrix.indices],
+             matrix.indptr), shape=total.shape)
+
+    def nodes_error(self):
+        """Return the standard error of the node probabilities."""
+        if self.count < 2:
+            return self._nodes * np.nan
+        mean = self._nodes / self.samples
+        dispersion = (self._squares / self.samples - mean ** 2).clip(lower=0)
+        return np.sqrt(dispersion / (self.count - 1))
+
+    def last_error(self):
+        """Return the largest standard error at the last time point."""
+        return float(self.nodes_error().iloc[-1].max())
+
+    def result(self, simul=None):
+        """Return the merged :py:class:`Result`.
+
+        If simul is given, the cfg of the result is the one of simul with
+        the total number of samples.
+        """
+        if not self.count:
+            raise ValueError("no result to merge")
+        states = np.empty(len(self._states), dtype=object)
+        for state, column in self._states.items():
+            states[column] = state
+        order = np.argsort(states.astype(str), kind="stable")
+        mean = (self._matrix / self.samples)[:, order].tocsr()
+        probtraj = ProbTraj._from_matrix(self._time_points, states[order],
+                                         mean.astype(self._dtype))
+
+        rows = []
+        for i, (weight, row) in enumerate(self._fixpoints.values()):
+            row = row.copy()
+            row['FP'] = "#%d" % (i + 1)
+            row['Proba'] = weight / self.samples
+            rows.append(row)
+        fptable = pd.DataFrame(rows, columns=self._fp_columns).reset_index(
+            drop=True)
+
+        bnd_text, cfg_text = self._model_text
+        if simul is not None:
+            merged = copy.copy(simul)
+            merged.param = simul.param.copy()
+            merged.param['sample_count'] = self.samples
+            cfg = io.StringIO()
+            merged.print_cfg(out=cfg)
+            cfg_text = cfg.getvalue()
+        result = Result._from_tables(probtraj, fptable, bnd_text, cfg_text,
+                                     self._palette, compact=self._compact)
+        result.nd_error = self.nodes_error()
+        if self.count >= 2:
+            # The squares have the same non zero entries as the means
+            squares = (self._matrix_squares / self.samples)[:, order].tocsr()
+            error = squares - mean.multiply(mean)
+            error.data = np.sqrt(error.data.clip(min=0) / (self.count - 1))
+            result._st_error = ProbTraj._from_matrix(
+                self._time_points, probtraj.states,
+                error.tocsr().astype(self._dtype))
+        return result
+
+
+__all__ = ["merge_results", "run_adaptive", "run_replicates"]
@@ -6,13 +6,23 @@ from sys import stderr, stdout
 from .figures import make_plot_trajectory, plot_piechart, plot_fix_point, plot_node_prob
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
+from pandas._libs.sparse import IntIndex
 import matplotlib.pyplot as plt
 import pyparsing as pp
 import shutil
 import tempfile
-from contextlib import ExitStack
 import os
 import subprocess
+import asyncio
+import io
+import logging
+import threading
+from concurrent.futures import CancelledError
+from time import perf_counter, sleep
+
+_logger = logging.getLogger(__name__)
+
 
 class Result(object):
     """
@@ -31,45 +41,268 @@ class Result(object):
     By default, the cfg, bnd and MaBoSS output are removed from the disk when the
     Result object is destructed. Result object has a method to save cfg, bnd and results
     in the working directory.
+
+    If ``compact`` is True, the state probabilities are kept as a sparse
+    matrix of float32 values, and :py:meth:`get_states_probtraj` returns a
+    table with sparse columns. Dense tables are then only built on request,
+    for instance for the states displayed by the plotting methods.
+
+    If ``wait`` is False, the constructor returns as soon as MaBoSS is
+    launched; :py:meth:`wait` must then be called before reading the results.
+
+    The output directory is created in ``workdir`` if it is given, for
+    instance a directory on a RAM-backed file system. It is removed by
+    :py:meth:`close`, when leaving a ``with`` block, or at the latest when the
+    Result is destructed. If ``in_memory`` is True, the output is parsed as
+    soon as MaBoSS terminates, and the directory is removed right away.
+
+    **Example**
+
+    >>> with sim.run(workdir="/dev/shm") as res:
+    ...     nodes = res.get_nodes_probtraj()
+
+    The parsed tables can be written in a binary file with :py:meth:`export`,
+    and read back with :py:func:`load_result`.
+
+    The ``timings`` attribute gives the time spent, in seconds, in each step
+    of the run:
+
+    * ``'render'`` and ``'write'``, to render the bnd and cfg files and to
+      write them. The bnd file is only rendered and written by the first run
+      of a network, the following runs only count the cfg file.
+    * ``'process'``, the wall time of MaBoSS, until it is waited for, and
+      ``'process_user'`` and ``'process_system'``, the CPU time it used
+    * ``'read'`` and ``'build'``, to read the output files and to build the
+      tables, once they have been requested
+
+    The ``usage`` attribute gives the peak memory of MaBoSS (``'max_rss'``)
+    and the size of its output files (``'output_size'``), in bytes. When
+    MaBoSS terminates, both are logged at the DEBUG level by the
+    ``maboss.result`` logger, the log record carrying them as its
+    ``timings`` and ``usage`` attributes. :py:func:`timing_table` gathers
+    them for a batch of results.
     """
 
-    def __init__(self, simul):
-        self._path = tempfile.mkdtemp()
-        self._cfg = tempfile.mkstemp(dir=self._path, suffix='.cfg')[1]
-        self._bnd = tempfile.mkstemp(dir=self._path, suffix='.bnd')[1]
+    def __init__(self, simul, compact=False, wait=True, workdir=None,
+                 in_memory=False):
+        start = perf_counter()
+        self._path = tempfile.mkdtemp(dir=workdir)
+        self._cfg = os.path.join(self._path, 'model.cfg')
+        self._owns_path = True
+        self._init_tables(simul.palette, compact)
+        self._in_memory = in_memory
+        self._max_time = _to_float(simul.param.get('max_time'))
+
+        # The bnd file is shared with the other runs of simul, as long as its
+        # network is not modified.
+        created = perf_counter()
+        self._bnd_file = simul._get_bnd_file(workdir)
+        self._bnd = self._bnd_file.path
+        bnd_timings = self._bnd_file.take_timings()
+        rendering = perf_counter()
+        cfg_text = io.StringIO()
+        simul.print_cfg(out=cfg_text)
+        rendered = perf_counter()
+        _write_text(self._cfg, cfg_text.getvalue())
+        self.timings.update({
+            'render': bnd_timings['render'] + rendered - rendering,
+            'write': (bnd_timings['write'] + created - start
+                      + perf_counter() - rendered),
+        })
+
+        self._err = None
+        self._started = perf_counter()
+        self._process = subprocess.Popen(["MaBoSS", "-c", self._cfg, "-o",
+                                          self._path+'/res', self._bnd])
+        if wait:
+            self.wait()
+
+    @classmethod
+    def _from_output(cls, path, bnd, cfg, palette, compact=False):
+        """Create a Result from the MaBoSS output files already in `path`.
+
+        The directory belongs to the caller, and is not removed when the
+        Result is destructed.
+        """
+        result = cls.__new__(cls)
+        result._path = path
+        result._bnd = bnd
+        result._bnd_file = None
+        result._cfg = cfg
+        result._owns_path = False
+        result._init_tables(palette, compact)
+        result._in_memory = False
+        result._err = 0
+        result._process = None
+        return result
+
+    @classmethod
+    def _from_tables(cls, probtraj, fptable, bnd_text, cfg_text, palette,
+                     compact=False, err=0):
+        """Create a Result from tables already in memory, without any
+        directory on the disk."""
+        result = cls.__new__(cls)
+        result._path = None
+        result._bnd = result._cfg = None
+        result._bnd_file = None
+        result._bnd_text, result._cfg_text = bnd_text, cfg_text
+        result._owns_path = False
+        result._init_tables(palette, compact)
+        result._in_memory = True
+        result._probtraj = probtraj
+        result.fptable = fptable
+        result._err = err
+        result._process = None
+        return result
+
+    def _init_tables(self, palette, compact):
         self._trajfig = None
         self._piefig = None
         self._fpfig = None
         self._ndtraj = None
-        self.palette = simul.palette
+        self.palette = palette
         self.fptable = None
         self.state_probtraj = None
         self.nd_probtraj = None
+        self.nd_error = None
+        self._st_error = None
+        self._probtraj = None
+        self._compact = compact
+        self.timings = {}
+        self.usage = {}
+        self.stopped_at = None
+        # Held to reap MaBoSS and to record its end, which may be waited for
+        # from several threads
+        self._lock = threading.RLock()
 
-        with ExitStack() as stack:
-            bnd_file = stack.enter_context(open(self._bnd, 'w'))
-            cfg_file = stack.enter_context(open(self._cfg, 'w'))
-            simul.print_bnd(out=bnd_file)
-            simul.print_cfg(out=cfg_file)
+    def wait(self, timeout=None):
+        """Wait for MaBoSS to terminate and return its exit code.
 
-        self._err = subprocess.call(["MaBoSS", "-c", self._cfg, "-o",
-                                     self._path+'/res', self._bnd])
-        if self._err:
-            print("Error, MaBoSS returned non 0 value", file=stderr)
+        :param float timeout: if MaBoSS is still running after `timeout`
+            seconds, ``subprocess.TimeoutExpired`` is raised
+        """
+        if self._err is None:
+            if timeout is None:
+                self._reap(block=True)
+            else:
+                deadline = perf_counter() + timeout
+                while not self._reap(block=False):
+                    if perf_counter() >= deadline:
+                        raise subprocess.TimeoutExpired(self._process.args,
+                                                        timeout)
+                    sleep(0.005)
+            self._finish(self._process.returncode)
+        return self._err
+
+    def _finish(self, err, report=True):
+        """Record the end of MaBoSS, only once. If report is False, a failure
+        is not reported and the output is not loaded."""
+        with self._lock:
+            if self._err is not None:
+                return
+            self._err = err
+            self._record_process()
+            if not report:
+                return
+            if self._err:
+                print("Error, MaBoSS returned non 0 value", file=stderr)
+            elif self._in_memory:
+                self._load_in_memory()
 
-    def plot_trajectory(self, legend=True, until=None):
+    def _load_in_memory(self):
+        """Parse the output, and remove the directory if it belongs to the
+        Result."""
+        self._get_probtraj()
+        self.get_fptable()
+        self._bnd_text, self._cfg_text = self._model_text()
+        self._in_memory = True
+        self.close()
+        self._path = self._bnd = self._cfg = None
+
+    def _reap(self, block):
+        """Return True if MaBoSS has terminated.
+
+        MaBoSS is reaped with os.wait4 when possible, to get the resources it
+        used. The Popen object does not know about it, so MaBoSS is only
+        reaped with the lock held, and a blocking call waits for MaBoSS
+        without holding it.
+        """
+        process = self._process
+        if block and process.returncode is None:
+            if hasattr(os, 'waitid'):
+                try:  # Wait for MaBoSS to terminate, without reaping it
+                    os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+                except ChildProcessError:  # Reaped by another thread
+                    pass
+            elif hasattr(os, 'wait4'):
+                while not self._reap(block=False):
+                    sleep(0.005)
+            else:
+                process.wait()
+        with self._lock:
+            if process.returncode is None and hasattr(os, 'wait4'):
+                try:
+                    pid, status, rusage = os.wait4(process.pid,
+                                                   0 if block else os.WNOHANG)
+                except ChildProcessError:  # Already reaped by Popen
+                    pid = 0
+                if pid:
+                    process.returncode = os.waitstatus_to_exitcode(status)
+                    self.timings['process_user'] = rusage.ru_utime
+                    self.timings['process_system'] = rusage.ru_stime
+                    self.usage['max_rss'] = rusage.ru_maxrss * 1024
+            return process.poll() is not None
+
+    def _record_process(self):
+        self.timings['process'] = perf_counter() - self._started
+        try:
+            self.usage['output_size'] = sum(
+                os.path.getsize(os.path.join(self._path, f))
+                for f in os.listdir(self._path) if f.startswith('res'))
+        except FileNotFoundError:  # Removed by close()
+            pass
+        _logger.debug("MaBoSS run in %s: %s %s", self._path, self.timings,
+                      self.usage,
+                      extra={'timings': self.timings, 'usage': self.usage})
+
+    def poll(self):
+        """Return the exit code of MaBoSS, or None if it is still running."""
+        if self._err is None and self._reap(block=False):
+            return self.wait()
+        return self._err
+
+    def kill(self):
+        """Stop MaBoSS if it is still running, and return True if it was."""
+        if self._process is None:
+            return False
+        with self._lock:
+            running = not self._reap(block=False)
+            if running:
+                self._process.kill()
+        if running:
+            self._reap(block=True)
+        return running
+
+    def plot_trajectory(self, legend=True, until=None, nb_states=None,
+                        start=None, stride=1):
         """Plot the graph state probability vs time.
 
         :param float until: plot only up to time=`until`
         :param bool legend: display legend
+        :param int nb_states: plot only the `nb_states` states reaching the
+            highest probabilities
+        :param float start: plot only from time=`start`
+        :param int stride: plot only one time point every `stride`
         """
         if self._err:
             print("Error, plot_trajectory cannot be called because MaBoSS"
                   "returned non 0 value", file=stderr)
             return
-        table = self.get_states_probtraj()
-        if until:
-            table = table[table.index <= until]
+        probtraj = self._window(start, until, stride)
+        if nb_states is not None:
+            table = probtraj.states_table(probtraj.top_states(nb_states))
+        else:
+            table = probtraj.states_table()
         _, ax = plt.subplots(1,1)
         make_plot_trajectory(table, ax, self.palette, legend=legend)
 
@@ -89,7 +322,7 @@ class Result(object):
                   "returned non 0 value", file=stderr)
             return
         self._piefig, self._pieax = plt.subplots(1, 1)
-        table = self.get_states_probtraj()
+        table = self._get_probtraj().last_table()
         plot_piechart(table, self._pieax, self.palette,
                 embed_labels=embed_labels, autopct=autopct,
                 prob_cutoff=prob_cutoff)
@@ -103,42 +336,275 @@ class Result(object):
         self._fpfig, self._fpax = plt.subplots(1, 1)
         plot_fix_point(self.get_fptable(), self._fpax, self.palette)
 
-    def plot_node_trajectory(self, until=None):
+    def plot_node_trajectory(self, until=None, start=None, stride=1):
         """Plot the probability of each node being up over time.
 
         :param float until: plot only up to time=`until`.
+        :param float start: plot only from time=`start`.
+        :param int stride: plot only one time point every `stride`.
         """
         if self._err:
             print("Error maboss previously returned non 0 value",
                   file=stderr)
             return
         self._ndtraj, self._ndtrajax = plt.subplots(1, 1)
-        table = self.get_nodes_probtraj()
-        if until:
-            table = table[table.index <= until]
+        if start is None and until is None and stride == 1:
+            table = self.get_nodes_probtraj()
+        else:
+            table = self._window(start, until, stride).nodes_table()
         plot_node_prob(table, self._ndtrajax, self.palette)
 
     def get_fptable(self): 
         """Return the content of fp.csv as a pandas dataframe."""
         if self.fptable is None:
+            start = perf_counter()
             table_file = "{}/res_fp.csv".format(self._path)
-            self.fptable = pd.read_csv(table_file, "\t", skiprows=[0])
+            self.fptable = pd.read_csv(table_file, sep="\t", skiprows=[0])
+            self._add_timing('read', perf_counter() - start)
         return self.fptable
 
     def get_nodes_probtraj(self):
         if self.nd_probtraj is None:
-            table_file = "{}/res_probtraj.csv".format(self._path)
-            table = pd.read_csv(table_file, "\t")
-            self.nd_probtraj = make_node_proba_table(table)
+            self.nd_probtraj = self._get_probtraj().nodes_table()
         return self.nd_probtraj
 
-    def get_states_probtraj(self):
+    def get_nodes_error(self):
+        """Return the standard error of the probability of each node over
+        time, if the result has been merged from several runs (see
+        :py:func:`merge_results`), None otherwise."""
+        return self.nd_error
+
+    def get_states_error(self, sparse=None):
+        """Return the standard error of the probability of each state over
+        time, if the result has been merged from several runs (see
+        :py:func:`merge_results`), None otherwise.
+
+        :param bool sparse: see :py:meth:`get_states_probtraj`
+        """
+        if self._st_error is None:
+            return None
+        if sparse is None:
+            sparse = self._compact
+        return self._st_error.states_table(sparse=sparse)
+
+    def get_states_probtraj(self, sparse=None):
+        """Return the probability of each state over time.
+
+        :param bool sparse: return a table with sparse columns instead of a
+            dense one (defaults to True iff the Result is compact)
+        """
+        if sparse is None:
+            sparse = self._compact
+        if sparse != self._compact:
+            return self._get_probtraj().states_table(sparse=sparse)
         if self.state_probtraj is None:
-            table_file = "{}/res_probtraj.csv".format(self._path)
-            table = pd.read_csv(table_file, "\t")
-            self.state_probtraj = make_trajectory_table(table)
+            self.state_probtraj = self._get_probtraj().states_table(
+                sparse=sparse)
         return self.state_probtraj
 
+    def get_last_states_probtraj(self):
+        """Return the probability of each state at the last time point, as a
+        pandas Series named by this time.
+
+        If the output has not been parsed yet, only its last line is read.
+        """
+        time, states, probas = self._last_time_point()
+        return pd.Series(probas, index=states, name=time, dtype=self._dtype())
+
+    def get_last_nodes_probtraj(self):
+        """Return the probability of each node being up at the last time
+        point, like :py:meth:`get_last_states_probtraj`."""
+        time, states, probas = self._last_time_point()
+        nodes = self._node_marginals(states, probas, {})
+        nodes.name = time
+        return nodes
+
+    def _last_time_point(self):
+        if self._probtraj is not None or self._path is None:
+            probtraj = self._get_probtraj()
+            last = probtraj.matrix[len(probtraj.time_points) - 1]
+            return (float(probtraj.time_points[-1]),
+                    list(probtraj.states[last.indices]), last.data.tolist())
+        last = read_last_probtraj(self._probtraj_file())
+        if last is None:
+            raise ValueError("No time point in %s" % self._probtraj_file())
+        return last
+
+    def get_condition_probtraj(self, on=(), off=()):
+        """Return the probability over time that all the nodes in `on` are up
+        and all the nodes in `off` are down, as a pandas Series."""
+        return self._get_probtraj().condition_table(on, off)
+
+    def get_projected_probtraj(self, nodes):
+        """Return the probability over time of each combination of values of
+        the given nodes, the other nodes being ignored."""
+        return self._get_probtraj().projected_table(nodes)
+
+    def get_states(self):
+        """Return the set of states reached during the simulation."""
+        return set(self._get_probtraj().states)
+
+    def get_nodes(self):
+        """Return the set of nodes that are up in at least one state."""
+        return set(self._get_probtraj().nodes())
+
+    def _get_probtraj(self):
+        """Parse res_probtraj.csv, only the first time it is needed."""
+        if self._probtraj is None:
+            self._probtraj = ProbTraj.from_file(self._probtraj_file(),
+                                                dtype=self._dtype(),
+                                                timings=self.timings)
+        return self._probtraj
+
+    def _add_timing(self, step, seconds):
+        self.timings[step] = self.timings.get(step, 0.0) + seconds
+
+    def _window(self, start, until, stride):
+        """Return the ProbTraj of the selected time points.
+
+        If the whole trajectory has not been parsed yet, only the selected
+        time points are read.
+        """
+        if start is None and until is None and stride == 1:
+            return self._get_probtraj()
+        if self._probtraj is not None:
+            return self._probtraj.window(start, until, stride)
+        return ProbTraj.from_file(self._probtraj_file(), start, until,
+                                  stride, dtype=self._dtype())
+
+    def _iter_probtraj(self, start, until, stride):
+        if self._path is None:
+            return self._probtraj.iter_rows(start, until, stride)
+        return iter_probtraj(self._probtraj_file(), start, until, stride)
+
+    def _probtraj_file(self):
+        return "{}/res_probtraj.csv".format(self._path)
+
+    def _dtype(self):
+        return np.float32 if self._compact else np.float64
+
+    def iter_states_probtraj(self, start=None, until=None, stride=1):
+        """Read the state probabilities one time point at a time.
+
+        The output of MaBoSS is read line by line, without loading it as a
+        whole, which allows to go through very large trajectories.
+
+        :param float start: skip the time points before `start`
+        :param float until: stop after time `until`
+        :param int stride: keep only one time point every `stride`
+        :return: an iterator of (time, pandas Series indexed by state)
+        """
+        for time, states, probas in self._iter_probtraj(start, until,
+                                                        stride):
+            yield time, pd.Series(probas, index=states, dtype=self._dtype())
+
+    def iter_nodes_probtraj(self, start=None, until=None, stride=1):
+        """Same as :py:meth:`iter_states_probtraj`, but with the probability
+        of each node being up."""
+        split_states = {}
+        for time, states, probas in self._iter_probtraj(start, until,
+                                                        stride):
+            yield time, self._node_marginals(states, probas, split_states)
+
+    def _node_marginals(self, states, probas, split_states):
+        """Return the probability of each node, split_states caching the
+        nodes of each state."""
+        nodes = {}
+        for state, proba in zip(states, probas):
+            if state not in split_states:
+                split_states[state] = state.split(' -- ')
+            for nd in split_states[state]:
+                nodes[nd] = nodes.get(nd, 0) + proba
+        return pd.Series(nodes, dtype=self._dtype()).sort_index()
+
+    def monitor(self, progress=None, converged=None, interval=0.1):
+        """
+        Follow the output of MaBoSS while it is running.
+
+        :param progress: a function called as ``progress(time, max_time)``
+            for each time point written by MaBoSS
+        :param converged: a function called as ``converged(time, nodes)`` for
+            each time point, with the probability of each node as a pandas
+            Series. As soon as it returns True, MaBoSS is stopped and the
+            result ends at this time point (see :py:func:`node_convergence`)
+        :param float interval: the delay between two reads of the output
+        :return: the exit code of MaBoSS
+
+        When MaBoSS is stopped early, ``stopped_at`` gives the last time
+        point, and the fixed point table is empty.
+        The time points are only seen while MaBoSS runs if it writes its
+        trajectory progressively, otherwise they are all seen at the end.
+        If MaBoSS has already terminated when `converged` returns True, the
+        whole output and the exit code of MaBoSS are kept.
+        """
+        if self._err is not None:
+            return self._err
+        split_states = {}
+        for offset, time, states, probas in _follow_probtraj(
+                self._probtraj_file(), lambda: not self._reap(block=False),
+                interval):
+            if progress is not None:
+                progress(time, self._max_time)
+            if (converged is not None and converged(
+                    time, self._node_marginals(states, probas, split_states))):
+                with self._lock:
+                    if not self.kill():
+                        break  # Already terminated, its output is kept
+                    # The lines written after this time point are dropped
+                    os.truncate(self._probtraj_file(), offset)
+                    if not os.path.exists(
+                            "{}/res_fp.csv".format(self._path)):
+                        self.fptable = pd.DataFrame(
+                            columns=["FP", "Proba", "State"])
+                    self.stopped_at = time
+                    self._finish(0)
+                break
+        return self.wait()
+
+    def export(self, filename):
+        """
+        Write the parsed tables of the result in a single binary file.
+
+        The file is a numpy ``.npz`` archive holding the sparse state
+        probabilities, the fixed points, and the text of the bnd and cfg
+        files. It is read back with :py:func:`load_result`, which does not
+        need MaBoSS nor to parse the text output again.
+
+        :param str filename: the file to write, ``.npz`` is appended if it
+            has no such extension
+        """
+        err = self.wait()
+        probtraj = self._get_probtraj()
+        matrix = probtraj.matrix
+        fptable = self.get_fptable()
+        bnd_text, cfg_text = self._model_text()
+        arrays = {
+            'format': np.array(_export_format),
+            'compact': np.array(self._compact),
+            'err': np.array(err),
+            'bnd': np.array(bnd_text),
+            'cfg': np.array(cfg_text),
+            'time_points': probtraj.time_points,
+            'states': probtraj.states.astype(str),
+            'data': matrix.data,
+            'indices': matrix.indices,
+            'indptr': matrix.indptr,
+            'fp_columns': np.array(fptable.columns, dtype=str),
+        }
+        for i, column in enumerate(fptable.columns):
+            values = fptable[column].to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+            arrays['fp_%d' % i] = values
+        np.savez_compressed(filename, **arrays)
+
+    def _model_text(self):
+        """Return the content of the bnd and cfg files."""
+        if self._path is None:
+            return self._bnd_text, self._cfg_text
+        with open(self._bnd) as bnd_file, open(self._cfg) as cfg_file:
+            return bnd_file.read(), cfg_file.read()
+
     def save(self, prefix, replace=False):
         """
         Write the cfg, bnd and all results in working dir.
@@ -166,6 +632,16 @@ class Result(object):
                       'replaced', file=stderr)
                 return
 
+        if self._path is None:
+            # The MaBoSS output is not on the disk, only its parsed tables
+            bnd_text, cfg_text = self._model_text()
+            with open(prefix+'/%s.bnd' % prefix, 'w') as bnd_file:
+                bnd_file.write(bnd_text)
+            with open(prefix+'/%s.cfg' % prefix, 'w') as cfg_file:
+                cfg_file.write(cfg_text)
+            self.export(prefix+'/%s.npz' % prefix)
+            return
+
         # Moves all the files into it
         shutil.copy(self._bnd, prefix+'/%s.bnd' % prefix)
         shutil.copy(self._cfg, prefix+'/%s.cfg' % prefix)
@@ -175,8 +651,123 @@ class Result(object):
         for f in maboss_files:
             shutil.copy(self._path + '/' + f, prefix)
 
+    def close(self):
+        """
+        Stop MaBoSS if it is still running, and remove the output directory.
+
+        The tables that have already been parsed remain available. Calling
+        close again has no effect.
+        """
+        if getattr(self, "_process", None) is not None:
+            self.kill()
+            self._finish(self._process.returncode, report=False)
+        if getattr(self, "_owns_path", False):
+            shutil.rmtree(self._path, ignore_errors=True)
+            self._owns_path = False
+        self._bnd_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     def __del__(self):
-        shutil.rmtree(self._path)
+        self.close()
+
+
+class PendingResult(object):
+    """
+    Handle on a simulation running in the background, returned by
+    :py:meth:`Simulation.run_async`.
+
+    The simulation can be polled with :py:meth:`done`, stopped with
+    :py:meth:`cancel` and waited for with :py:meth:`result`. A PendingResult
+    can also be awaited from a coroutine, which gives the :py:class:`Result`;
+    use ``asyncio.wait_for`` to set a timeout. Cancelling the awaiting task
+    kills MaBoSS.
+    """
+
+    def __init__(self, result):
+        self._result = result
+        self._cancelled = False
+
+    def done(self):
+        """Return True if MaBoSS has terminated or has been cancelled."""
+        return self._result.poll() is not None
+
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        """Kill MaBoSS, return False if it had already terminated."""
+        if self.done():
+            return False
+        self._cancelled = True
+        self._result.kill()
+        self._result._finish(self._result._process.returncode, report=False)
+        return True
+
+    def result(self, timeout=None):
+        """Wait for the simulation and return its :py:class:`Result`.
+
+        :param float timeout: raise ``TimeoutError`` if MaBoSS is still
+            running after `timeout` seconds
+        """
+        if self._cancelled:
+            raise CancelledError()
+        try:
+            self._result.wait(timeout)
+        except subprocess.TimeoutExpired:
+            raise TimeoutError("MaBoSS still running after %s s" % timeout)
+        return self._result
+
+    def monitor(self, progress=None, converged=None, interval=0.1):
+        """Follow MaBoSS until it terminates or converges, and return the
+        :py:class:`Result` (see :py:meth:`Result.monitor`)."""
+        if self._cancelled:
+            raise CancelledError()
+        self._result.monitor(progress, converged, interval)
+        return self._result
+
+    def __await__(self):
+        return self._wait_async().__await__()
+
+    async def _wait_async(self):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._result.wait)
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+        return self.result()
+
+
+def ram_workdir():
+    """
+    Return a directory of a RAM-backed file system, or None if there is
+    none.
+
+    It can be given as the ``workdir`` of :py:meth:`Simulation.run`, so that
+    the input and output files of MaBoSS are never written on a disk.
+    """
+    for path in ("/dev/shm", os.environ.get("XDG_RUNTIME_DIR")):
+        if path and os.path.isdir(path) and os.access(path, os.W_OK):
+            return path
+    return None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _write_text(path, text):
+    """Write a file rendered in memory with a single write."""
+    with open(path, 'w') as out:
+        out.write(text)
 
 
 def _check_prefix(prefix):
@@ -188,71 +779,444 @@ def _check_prefix(prefix):
         return prefix_grammar.matches(prefix)
 
 
+class ProbTraj(object):
+    """
+    Parsed content of a probtraj table.
+
+    Each state is interned once in ``states`` (sorted by name), and the
+    probabilities are stored in ``matrix``, a sparse time x state matrix whose
+    rows are indexed by ``time_points`` and columns by ``states``.
+    Both the state and the node tables are derived from this representation.
+    Each state is also encoded as a bitset of the nodes that are up (see
+    :py:meth:`bits`), so that selecting states by the value of some nodes,
+    or grouping them, are vectorized operations.
+
+    :param df: the content of a probtraj file
+    :param dtype: the type used to store probabilities
+    """
+
+    def __init__(self, df, dtype=np.float64):
+        rows, states, probas = _probtraj_long(df)
+        self._build(np.asarray(df['Time']), rows, states, probas, dtype)
+
+    @classmethod
+    def from_file(cls, path, start=None, until=None, stride=1,
+                  dtype=np.float64, timings=None):
+        """Build a ProbTraj by reading a probtraj file line by line.
+
+        Only the time points selected as in :py:func:`iter_probtraj` are
+        kept, and the file is never loaded as a whole. If `timings` is a
+        dictionary, the time spent to read the file and to build the matrix
+        are added to its ``'read'`` and ``'build'`` values.
+        """
+        begin = perf_counter()
+        time_points, rows, states, probas = [], [], [], []
+        interned = {}
+        for i, (time, line_states, line_probas) in enumerate(
+                iter_probtraj(path, start, until, stride)):
+            time_points.append(time)
+            rows.extend([i] * len(line_states))
+            states.extend(interned.setdefault(s, s) for s in line_states)
+            probas.extend(line_probas)
+        read = perf_counter()
+        probtraj = cls.__new__(cls)
+        probtraj._build(np.array(time_points, dtype=float),
+                        np.array(rows, dtype=np.intp),
+                        np.array(states, dtype=object),
+                        np.array(probas, dtype=float), dtype)
+        if timings is not None:
+            timings['read'] = timings.get('read', 0.0) + read - begin
+            timings['build'] = (timings.get('build', 0.0)
+                                + perf_counter() - read)
+        return probtraj
+
+    def _build(self, time_points, rows, states, probas, dtype):
+        codes, self.states = pd.factorize(states, sort=True)
+        self.time_points = time_points
+        self.matrix = sp.csr_matrix(
+            (probas.astype(dtype), (rows, codes)),
+            shape=(len(self.time_points), len(self.states)))
+        self._incidence = None
+        self._nodes = None
+        self._bits = None
+
+    def window(self, start=None, until=None, stride=1):
+        """Return a ProbTraj restricted to the time points between `start`
+        and `until`, keeping one time point every `stride`."""
+        selected = np.ones(len(self.time_points), dtype=bool)
+        if start is not None:
+            selected &= self.time_points >= start
+        if until is not None:
+            selected &= self.time_points <= until
+        rows = np.nonzero(selected)[0][::stride]
+        matrix = self.matrix[rows]
+        reached = np.unique(matrix.indices)
+        return ProbTraj._from_matrix(self.time_points[rows],
+                                     self.states[reached],
+                                     matrix[:, reached])
+
+    @classmethod
+    def _from_matrix(cls, time_points, states, matrix):
+        probtraj = cls.__new__(cls)
+        probtraj.time_points = time_points
+        probtraj.states = states
+        probtraj.matrix = matrix
+        probtraj._incidence = None
+        probtraj._nodes = None
+        probtraj._bits = None
+        return probtraj
+
+    def iter_rows(self, start=None, until=None, stride=1):
+        """Same as :py:func:`iter_probtraj`, for a parsed trajectory."""
+        window = self.window(start, until, stride)
+        matrix = window.matrix
+        for i, time in enumerate(window.time_points):
+            begin, end = matrix.indptr[i], matrix.indptr[i + 1]
+            states = window.states[matrix.indices[begin:end]]
+            yield (float(time), list(states),
+                   matrix.data[begin:end].tolist())
+
+    def nodes(self):
+        """Return the sorted list of nodes appearing in the states."""
+        if self._nodes is None:
+            self._incidence, self._nodes = _state_node_incidence(self.states)
+        return self._nodes
+
+    def incidence(self):
+        """Return the sparse state-to-node incidence matrix."""
+        if self._incidence is None:
+            self._incidence, self._nodes = _state_node_incidence(self.states)
+        return self._incidence
+
+    def bits(self):
+        """Return the states as bitsets of the nodes that are up.
+
+        The result is an array of uint64 words with one row per state, where
+        node ``nodes()[j]`` is bit ``j % 64`` of word ``j // 64``.
+        """
+        if self._bits is None:
+            incidence = self.incidence().tocoo()
+            self._bits = np.zeros((len(self.states),
+                                   max(1, -(-len(self.nodes()) // 64))),
+                                  dtype=np.uint64)
+            np.bitwise_or.at(self._bits, (incidence.row, incidence.col // 64),
+                             _bit(incidence.col % 64))
+        return self._bits
+
+    def _node_mask(self, nodes):
+        """Return the bitset of the given nodes, ignoring unknown nodes."""
+        mask = np.zeros(self.bits().shape[1], dtype=np.uint64)
+        positions = {nd: j for j, nd in enumerate(self.nodes())}
+        for nd in nodes:
+            if nd in positions:
+                j = positions[nd]
+                mask[j // 64] |= _bit(j % 64)
+        return mask
+
+    def select(self, on=(), off=()):
+        """Return a boolean array telling, for each state, if all the nodes
+        in `on` are up and all the nodes in `off` are down."""
+        if any(nd not in self.nodes() for nd in on):
+            return np.zeros(len(self.states), dtype=bool)
+        bits = self.bits()
+        on_mask, off_mask = self._node_mask(on), self._node_mask(off)
+        return (((bits & on_mask) == on_mask).all(axis=1)
+                & ((bits & off_mask) == 0).all(axis=1))
+
+    def condition_table(self, on=(), off=()):
+        """Return the probability over time of the states selected as in
+        :py:meth:`select`, as a pandas Series."""
+        selected = self.select(on, off).astype(self.matrix.dtype)
+        return pd.Series(self.matrix @ selected, index=self.time_points)
+
+    def projected_table(self, nodes):
+        """Return the probability over time of each combination of values of
+        the given nodes, as a time x combination DataFrame.
+
+        The combinations are labelled like states, with the nodes that are up
+        in the order of `nodes`, or ``<nil>`` if none is up.
+        """
+        keys = self.bits() & self._node_mask(nodes)
+        groups, inverse = np.unique(keys, axis=0, return_inverse=True)
+        grouping = sp.csr_matrix(
+            (np.ones(len(self.states), dtype=self.matrix.dtype),
+             (np.arange(len(self.states)), inverse.ravel())),
+            shape=(len(self.states), len(groups)))
+        positions = {nd: j for j, nd in enumerate(self.nodes())}
+        labels = []
+        for group in groups:
+            up = [nd for nd in nodes if nd in positions
+                  and group[positions[nd] // 64] & _bit(positions[nd] % 64)]
+            labels.append(" -- ".join(up) or "<nil>")
+        return pd.DataFrame((self.matrix @ grouping).toarray(),
+                            index=self.time_points, columns=labels)
+
+    def states_table(self, states=None, sparse=False):
+        """Return the state probabilities as a time x state DataFrame.
+
+        :param states: if not None, only the columns of these states are built
+        :param bool sparse: build a DataFrame with sparse columns indexed by
+            categorical state labels instead of densifying the matrix
+        """
+        matrix, columns = self.matrix, self.states
+        if states is not None:
+            positions = np.searchsorted(self.states, states)
+            matrix, columns = matrix[:, positions], self.states[positions]
+        if sparse:
+            # Same as pd.DataFrame.sparse.from_spmatrix, which fills the
+            # float columns with NaN instead of 0 since pandas 3
+            matrix = matrix.tocsc()
+            matrix.sort_indices()
+            dtype = pd.SparseDtype(matrix.dtype, 0)
+            indices = matrix.indices.astype(np.int32, copy=False)
+            arrays = [pd.arrays.SparseArray._simple_new(
+                          matrix.data[a:b],
+                          IntIndex(matrix.shape[0], indices[a:b],
+                                   check_integrity=False), dtype)
+                      for a, b in zip(matrix.indptr[:-1], matrix.indptr[1:])]
+            return pd.DataFrame._from_arrays(
+                arrays, columns=pd.CategoricalIndex(columns),
+                index=pd.Index(self.time_points), verify_integrity=False)
+        return pd.DataFrame(matrix.toarray(), index=self.time_points,
+                            columns=columns)
+
+    def top_states(self, k):
+        """Return the k states reaching the highest probabilities."""
+        peaks = self.matrix.max(axis=0).toarray().ravel()
+        best = np.argsort(-peaks, kind="stable")[:k]
+        return self.states[np.sort(best)]
+
+    def last_table(self):
+        """Return the states reached at the last time point as a one row
+        DataFrame."""
+        last = self.matrix[len(self.time_points) - 1]
+        return pd.DataFrame(last.data[np.newaxis, :],
+                            index=self.time_points[-1:],
+                            columns=self.states[last.indices])
+
+    def nodes_table(self):
+        """Return the node probabilities as a time x node DataFrame."""
+        return pd.DataFrame((self.matrix @ self.incidence()).toarray(),
+                            index=self.time_points, columns=self.nodes())
+
+
+def load_result(filename, palette=None):
+    """
+    Read a Result written by :py:meth:`Result.export`.
+
+    :param str filename: the file written by :py:meth:`Result.export`
+    :param dict palette: the colors of the states in the plots
+    :rtype: :py:class:`Result`, whose tables are in memory
+    """
+    with np.load(filename) as archive:
+        if int(archive['format']) != _export_format:
+            raise ValueError("Unsupported format of exported result: %s"
+                             % archive['format'])
+        time_points = archive['time_points']
+        states = archive['states'].astype(object)
+        probtraj = ProbTraj._from_matrix(time_points, states, sp.csr_matrix(
+            (archive['data'], archive['indices'], archive['indptr']),
+            shape=(len(time_points), len(states))))
+        fptable = pd.DataFrame({
+            str(column): _from_export(archive['fp_%d' % i])
+            for i, column in enumerate(archive['fp_columns'])})
+        return Result._from_tables(
+            probtraj, fptable, str(archive['bnd']), str(archive['cfg']),
+            palette if palette is not None else {},
+            compact=bool(archive['compact']), err=int(archive['err']))
+
+
+def _from_export(values):
+    return values.astype(object) if values.dtype.kind == 'U' else values
+
+
+# Version of the layout of the files written by Result.export
+_export_format = 1
+
+
+def iter_probtraj(path, start=None, until=None, stride=1):
+    """Read a probtraj file line by line.
+
+    :param str path: the probtraj file
+    :param float start: skip the time points before `start`
+    :param float until: stop after time `until`
+    :param int stride: keep only one time point every `stride`
+    :return: an iterator of (time, states, probabilities) tuples
+    """
+    with open(path) as table_file:
+        header = table_file.readline().rstrip('\r\n').split('\t')
+        first = header.index('State')
+        count = 0
+        for line in table_file:
+            fields = line.rstrip('\r\n').split('\t')
+            if not fields[0]:
+                continue
+            time = float(fields[0])
+            if start is not None and time < start:
+                continue
+            if until is not None and time > until:
+                break
+            if count % stride == 0:
+                yield (time,) + _parse_states(fields, first)
+            count += 1
+
+
+def read_last_probtraj(path):
+    """
+    Read only the last time point of a probtraj file.
+
+    The file is read backwards from its end, so that the cost does not
+    depend on the number of time points.
+
+    :param str path: the probtraj file
+    :return: a (time, states, probabilities) tuple, or None if the file has
+        no time point
+    """
+    with open(path, 'rb') as table_file:
+        header = table_file.readline().decode().rstrip('\r\n').split('\t')
+        first = header.index('State')
+        header_end = table_file.tell()
+        position = table_file.seek(0, os.SEEK_END)
+        data = b''
+        block = 1 << 16
+        while position > header_end:
+            step = min(block, position - header_end)
+            position -= step
+            table_file.seek(position)
+            data = table_file.read(step) + data
+            if b'\n' in data.rstrip(b'\r\n'):
+                break
+            block *= 2
+    line = data.rstrip(b'\r\n').rsplit(b'\n', 1)[-1]
+    if not line:
+        return None
+    fields = line.decode().rstrip('\r').split('\t')
+    return (float(fields[0]),) + _parse_states(fields, first)
+
+
+def _parse_states(fields, first):
+    """Return the states and the probabilities of a probtraj line."""
+    pairs = [(state, float(proba)) for state, proba
+             in zip(fields[first::3], fields[first + 1::3]) if state]
+    return [state for state, _ in pairs], [proba for _, proba in pairs]
+
+
+def _follow_probtraj(path, running, interval):
+    """Read a probtraj file while MaBoSS writes it.
+
+    Yields the offset of the end of each complete line with its time, states
+    and probabilities, until running() returns False.
+    """
+    table_file = None
+    pending = b''
+    offset = 0
+    first = None
+    try:
+        while True:
+            finished = not running()
+            if table_file is None and os.path.exists(path):
+                table_file = open(path, 'rb')
+            if table_file is not None:
+                pending += table_file.read()
+                *lines, pending = pending.split(b'\n')
+                for line in lines:
+                    offset += len(line) + 1
+                    fields = line.decode().rstrip('\r').split('\t')
+                    if first is None:
+                        first = fields.index('State')
+                    elif fields[0]:
+                        yield ((offset, float(fields[0]))
+                               + _parse_states(fields, first))
+            if finished:
+                return
+            sleep(interval)
+    finally:
+        if table_file is not None:
+            table_file.close()
+
+
+def node_convergence(tolerance=1e-3, window=5):
+    """
+    Return a convergence predicate for :py:meth:`Result.monitor`.
+
+    The predicate returns True once the probability of every node has
+    changed by at most `tolerance` over the last `window` time points.
+    """
+    history = []
+
+    def converged(time, nodes):
+        history.append(nodes)
+        del history[:-window - 1]
+        if len(history) <= window:
+            return False
+        return all((nodes.sub(previous, fill_value=0).abs() <= tolerance).all()
+                   for previous in history[:-1])
+    return converged
+
+
 def make_trajectory_table(df):
     """Creates a table giving the probablilty of each state a every moment.
 
         The rows are indexed by time points and the columns are indexed by
         state name.
     """
-    states = get_states(df)
-    nb_sates = len(states)
-    time_points = np.asarray(df['Time'])
-    time_table = pd.DataFrame(np.zeros((len(time_points), nb_sates)),
-                              index=time_points, columns=states)
-
-    cols = list(filter(lambda s: s.startswith("State"), df.columns))
-    for i in df.index:
-        tp = df["Time"][i]
-        for c in cols:
-            prob_col = c.replace("State", "Proba")
-            if type(df[c][i]) is str:  # Otherwise it is nan
-                state = df[c][i]
-                time_table[state][tp] = df[prob_col][i]
-
-    time_table.sort_index(axis=1, inplace=True)
-    return time_table
+    return ProbTraj(df).states_table()
 
 
 def make_node_proba_table(df):
     """Same as make_trajectory_table but with nodes instead of states."""
-    nodes = get_nodes(df)
-    nb_nodes = len(nodes)
-    time_points = np.asarray(df['Time'])
-    time_table = pd.DataFrame(np.zeros((len(time_points), nb_nodes)),
-                              index=time_points, columns=nodes)
-    cols = list(filter(lambda s: s.startswith("State"), df.columns))
-    for i in df.index:
-        tp = df["Time"][i]
-        for c in cols:
-            prob_col = c.replace("State", "Proba")
-            if type(df[c][i]) is str:
-                state = df[c][i]
-                if ' -- ' in state:
-                    nodes = state.split(' -- ')
-                else:
-                    nodes = [state]
-                for nd in nodes:
-                    time_table[nd][tp] += df[prob_col][i]
-
-    time_table.sort_index(axis=1, inplace=True)
-    return time_table
-    
+    return ProbTraj(df).nodes_table()
+
+
+def _probtraj_long(df):
+    """Reshape the State/Proba columns of a probtraj table in long form.
+
+    Return, for every non empty State cell, its row position, the state name
+    and the associated probability, in row-major order.
+    """
+    state_cols = _state_columns(df)
+    prob_cols = [c.replace("State", "Proba") for c in state_cols]
+    states = df[state_cols].to_numpy(dtype=object)
+    probas = df[prob_cols].to_numpy(dtype=float)
+    mask = pd.notna(states)  # Empty cells are nan
+    rows = np.nonzero(mask)[0]
+    return rows, states[mask], probas[mask]
+
+
+def _state_node_incidence(states):
+    """Sparse matrix M such that M[i, j] = 1 iff node j is up in states[i].
+
+    Return the matrix and the sorted list of nodes indexing its columns.
+    """
+    split_states = [s.split(' -- ') for s in states]
+    nodes = sorted(set(nd for nds in split_states for nd in nds))
+    node_index = {nd: j for j, nd in enumerate(nodes)}
+    rows = [i for i, nds in enumerate(split_states) for _ in nds]
+    cols = [node_index[nd] for nds in split_states for nd in nds]
+    incidence = sp.csr_matrix((np.ones(len(rows)), (rows, cols)),
+                                  shape=(len(split_states), len(nodes)))
+    return incidence, nodes
+
+
+def _bit(positions):
+    """Return the uint64 words with the bits at the given positions set."""
+    return np.left_shift(np.uint64(1), np.asarray(positions, dtype=np.uint64))
+
+
+def _state_columns(df):
+    return [c for c in df.columns if c.startswith("State")]
+
+
 def get_nodes(df):
-    states = get_states(df)
     nodes = set()
-    for s in states:
-        nds = s.split(' -- ')
-        for nd in nds:
-            nodes.add(nd)
+    for s in get_states(df):
+        nodes.update(s.split(' -- '))
     return nodes
-        
+
+
 def get_states(df):
-    cols = list(filter(lambda s: s.startswith("State"), df.columns))
-    states = set()
-    for i in df.index:
-        for c in cols:
-            if type(df[c][i]) is str:  # Otherwise it is nan
-                states.add(df[c][i])
-    return states
-
-__all__ = ["Result"]
+    states = df[_state_columns(df)].to_numpy(dtype=object).ravel()
+    return set(pd.unique(states[pd.notna(states)]))
+
+__all__ = ["Result", "PendingResult", "load_result", "ram_workdir",
+           "node_convergence"]
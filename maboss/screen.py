@@ -0,0 +1,118 @@
+"""Functions to simulate all the combinations of mutations of a set of
+nodes."""
+
+
+import copy
+import itertools
+from sys import stderr
+
+import numpy as np
+import pandas as pd
+
+from .batch import iter_simulations
+from .sweep import _last_nodes
+
+
+def mutant_combinations(nodes, order=1, states=("ON", "OFF")):
+    """
+    Return the combinations of up to `order` mutations of the nodes.
+
+    :param nodes: the names of the nodes that can be mutated
+    :param int order: the largest number of nodes mutated at the same time
+    :param states: the mutations of each node
+    :rtype: list of tuples of (node, state) pairs, the empty tuple being the
+        wild type
+
+    **Example**
+
+    >>> mutant_combinations(['A', 'B'], order=2, states=['ON'])
+    [(), (('A', 'ON'),), (('B', 'ON'),), (('A', 'ON'), ('B', 'ON'))]
+    """
+    combinations = []
+    for k in range(order + 1):
+        for mutated in itertools.combinations(nodes, k):
+            for mutations in itertools.product(states, repeat=k):
+                combinations.append(tuple(zip(mutated, mutations)))
+    return combinations
+
+
+def mutant_screen(simul, nodes, order=1, states=("ON", "OFF"), outputs=None,
+                  max_workers=None, compact=False, cache=None, backend=None):
+    """
+    Simulate the combinations of mutations of several nodes, and return the
+    probability of each node at the last time point.
+
+    :param simul: the wild type simulation
+    :type simul: :py:class:`Simulation`
+    :param nodes: the names of the nodes that can be mutated
+    :param int order: the largest number of nodes mutated at the same time
+    :param states: the mutations of each node, ``'ON'`` or ``'OFF'``
+    :param outputs: the nodes whose probabilities are kept (defaults to all
+        the nodes reached by at least one mutant)
+    :param int max_workers: passed to :py:func:`run_simulations`
+    :param bool compact: store the probabilities as float32 values
+    :param cache: passed to :py:meth:`Simulation.run`
+    :param backend: passed to :py:meth:`Simulation.run`
+    :rtype: pandas DataFrame, with one row per combination and one column
+        per output node. The rows are indexed by the state of each mutable
+        node, ``'WT'``, ``'ON'`` or ``'OFF'``.
+
+    All the nodes are made mutable in a single bnd file, which is written
+    once, and each combination only changes the ``$Low_`` and ``$High_``
+    variables of the cfg file. Each :py:class:`Result` is summarized and
+    removed as soon as its simulation completes. A combination that fails
+    gives a row of NaN, and is reported on stderr.
+
+    **Example**
+
+    >>> table = mutant_screen(sim, ['p53', 'Notch_pthw'], order=2)
+    >>> table.xs('OFF', level='p53')['Apoptosis']
+    """
+    unknown = [nd for nd in nodes if nd not in simul.network]
+    if unknown:
+        raise ValueError("Unknown nodes: %s" % ", ".join(unknown))
+    base = simul.copy()
+    for nd in nodes:
+        base.mutate(nd, "WT")
+    base._get_bnd_file()  # Written once, shared by the copies below
+
+    combinations = mutant_combinations(nodes, order, states)
+    variants = {}
+    for i, mutations in enumerate(combinations):
+        variants[i] = copy.copy(base)
+        variants[i].param = base.param.copy()
+        for nd, state in mutations:
+            variants[i].param["$Low_" + nd] = int(state == "OFF")
+            variants[i].param["$High_" + nd] = int(state == "ON")
+
+    rows = [None] * len(combinations)
+    for i, result, error in iter_simulations(variants, max_workers, compact,
+                                             cache, backend=backend):
+        if error is not None:
+            print("Error, mutant %s failed: %s"
+                  % (_label(combinations[i]), error), file=stderr)
+            continue
+        rows[i] = _last_nodes(result)
+        result.close()
+
+    index = pd.MultiIndex.from_tuples(
+        [tuple(dict(mutations).get(nd, "WT") for nd in nodes)
+         for mutations in combinations], names=list(nodes))
+    table = pd.DataFrame([row if row is not None else pd.Series(dtype=float)
+                          for row in rows])
+    if outputs is not None:
+        table = table.reindex(columns=list(outputs))
+    else:
+        table = table.drop(columns="<nil>", errors="ignore")
+    # A node missing from a result has a 0 probability
+    succeeded = [row is not None for row in rows]
+    table.loc[succeeded] = table.loc[succeeded].fillna(0)
+    table.index = index if len(nodes) > 1 else index.get_level_values(0)
+    return table.astype(np.float32 if compact else np.float64)
+
+
+def _label(mutations):
+    return ", ".join("%s %s" % m for m in mutations) or "wild type"
+
+
+__all__ = ["mutant_screen", "mutant_combinations"]
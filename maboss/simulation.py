@@ -7,8 +7,13 @@ from contextlib import ExitStack
 
 from colomoto import ModelState
 
-from .result import Result
+from .result import Result, PendingResult, _write_text
+from .replicates import run_adaptive, run_replicates
+from time import perf_counter
+import io
 import os
+import shutil
+import tempfile
 import uuid
 
 _default_parameter_list = {'time_tick': 0.1,
@@ -59,7 +64,7 @@ class Simulation(object):
         :type nt: :py:class:`Network`
         :param dict kwargs: parameters of the simulation
         """
-        self.param = _default_parameter_list
+        self.param = _default_parameter_list.copy()
         if 'palette' in kwargs:
             self.palette = kwargs.pop('palette')
         else:
@@ -73,6 +78,8 @@ class Simulation(object):
         self.network = nt
         self.mutations = []
         self.refstate = {}
+        # The last bnd file written for self.network, shared by the Results
+        self._bnd_file = None
 
     def update_parameters(self, **kwargs):
         """Add elements to ``self.param``."""
@@ -84,14 +91,29 @@ class Simulation(object):
 
     def copy(self):
         new_network = self.network.copy()
-        result = Simulation(new_network, **(self.param), palette=self.palette)
+        result = Simulation(new_network, palette=self.palette)
+        result.param = self.param.copy()  # Already checked
         if self.mutations:
             result.mutations = self.mutations.copy()
+        result.refstate = self.refstate.copy()
+        # Still valid as long as the nodes are not modified
+        result._bnd_file = self._bnd_file
         return result
 
     def print_bnd(self, out=stdout):
         """Produce the content of the bnd file associated to the simulation."""
-        print(self.network, file=out)
+        self.network.print_bnd(out=out)
+
+    def _get_bnd_file(self, workdir=None):
+        """Return a _BndFile for self.network.
+
+        The file is written again only if the network has been modified since
+        the last call, in workdir if it is not None.
+        """
+        key = self.network._bnd_key()
+        if self._bnd_file is None or self._bnd_file.key != key:
+            self._bnd_file = _BndFile(self, key, workdir)
+        return self._bnd_file
 
     def print_cfg(self, out=stdout):
         """Produce the content of the cfg file associated to the simulation."""
@@ -107,19 +129,71 @@ class Simulation(object):
                 print(p + ' = ' + str(self.param[p]) + ';', file=out)
 
         for name in self.network.names:
-            string = name+'.is_internal = ' + str(int(self.network[name].is_internal)) + ';'
+            string = name+'.is_internal = ' + str(int(self.network._peek(name).is_internal)) + ';'
             print(string, file=out)
 
         for nd in self.refstate:
             string = nd +'.refstate = ' + self.refstate[nd] + ';'
             print(string, file=out)
 
-    def run(self):
+    def run(self, compact=False, cache=None, workdir=None, in_memory=False,
+            backend=None):
         """Run the simulation with MaBoSS and return a Result object.
 
+        :param bool compact: keep the state probabilities in a sparse, float32
+            representation (see :py:class:`Result`)
+        :param cache: if not None, MaBoSS is only run if the outputs of this
+            simulation are not already in the cache
+        :type cache: :py:class:`ResultCache`
+        :param str workdir: the directory where the output directory is
+            created (defaults to the system temporary directory)
+        :param bool in_memory: parse the output as soon as MaBoSS terminates
+            and remove the output directory
+        :param backend: where MaBoSS is run (defaults to a subprocess of the
+            current process)
+        :type backend: :py:class:`SpoolBackend` or :py:class:`LocalBackend`
+        :rtype: :py:class:`Result`
+        """
+        if cache is not None:
+            return cache.run(self, compact=compact, workdir=workdir,
+                             in_memory=in_memory, backend=backend)
+        if backend is not None:
+            return backend.run(self, compact=compact, workdir=workdir,
+                               in_memory=in_memory)
+        return Result(self, compact=compact, workdir=workdir,
+                      in_memory=in_memory)
+
+    def run_adaptive(self, target_error=0.01, batch_size=None,
+                     max_samples=None, max_workers=None, compact=False):
+        """Run the simulation in batches of trajectories, until the standard
+        error of the node probabilities is below `target_error`.
+
+        See :py:func:`run_adaptive` for the parameters.
+
         :rtype: :py:class:`Result`
         """
-        return Result(self)
+        return run_adaptive(self, target_error, batch_size, max_samples,
+                            max_workers=max_workers, compact=compact)
+
+    def run_replicates(self, replicates=10, max_workers=None,
+                       compact=False):
+        """Run the simulation `replicates` times with different seeds, and
+        merge the results (see :py:func:`run_replicates`).
+
+        :rtype: :py:class:`Result`
+        """
+        return run_replicates(self, replicates, max_workers, compact)
+
+    def run_async(self, compact=False, workdir=None, in_memory=False):
+        """Launch MaBoSS without waiting for it to terminate.
+
+        :param bool compact: see :py:meth:`run`
+        :param str workdir: see :py:meth:`run`
+        :param bool in_memory: see :py:meth:`run`
+        :rtype: :py:class:`PendingResult`
+        """
+        return PendingResult(Result(self, compact=compact, wait=False,
+                                    workdir=workdir, in_memory=in_memory))
 
 
     def mutate(self, node, state):
@@ -173,14 +247,43 @@ class Simulation(object):
             print("Error, state must be ON, OFF or WT", file=stderr)
             return
 
-    def continue_from_result(self, result):
-        """Set the initial state from as the last state from result."""
-        node_prob = result.get_nodes_probtraj()
-        nodes = node_prob.iloc[-1]
-        for i in nodes.index:
-            if i != "<nil>":
-                prob = nodes[i]
-                self.network.set_istate(i, [1 - prob, prob])
+    def continue_from_result(self, result, joint=False):
+        """Set the initial state from as the last state from result.
+
+        Only the last time point of the result is read.
+
+        :param bool joint: if True, the output nodes are bound, and their
+            initial state is the joint distribution of the last time point.
+            Otherwise each node gets its own probability of being up.
+        """
+        time, states, probas = result._last_time_point()
+        reached = set(nd for state in states for nd in state.split(' -- '))
+        # A node that is not internal but never up has a 0 probability
+        outputs = [nd for nd in self.network.names if nd in reached
+                   or not int(self.network._peek(nd).is_internal)]
+        if not outputs:
+            return
+        for nd in outputs:
+            if isinstance(self.network._attribution[nd], tuple):
+                self.network._erase_binding(nd)
+        if not joint:
+            nodes = result._node_marginals(states, probas, {})
+            for nd in outputs:
+                prob = float(nodes.get(nd, 0))
+                self.network.set_istate(nd, [1 - prob, prob])
+            return
+
+        positions = {nd: j for j, nd in enumerate(outputs)}
+        distribution = {}
+        total = sum(probas)
+        for state, proba in zip(states, probas):
+            values = [0] * len(outputs)
+            for nd in state.split(' -- '):
+                if nd in positions:
+                    values[positions[nd]] = 1
+            values = tuple(values)
+            distribution[values] = distribution.get(values, 0) + proba / total
+        self.network.set_istate(outputs, distribution)
 
     def get_initial_state(self):
         """
@@ -196,6 +299,34 @@ class Simulation(object):
         return istate
 
 
+class _BndFile(object):
+    """A bnd file in a temporary directory, removed with the object."""
+
+    def __init__(self, simul, key, workdir=None):
+        self.key = key
+        start = perf_counter()
+        self._dir = tempfile.mkdtemp(dir=workdir)
+        self.path = os.path.join(self._dir, 'model.bnd')
+        rendering = perf_counter()
+        text = io.StringIO()
+        simul.print_bnd(out=text)
+        rendered = perf_counter()
+        _write_text(self.path, text.getvalue())
+        self._timings = {
+            'render': rendered - rendering,
+            'write': rendering - start + perf_counter() - rendered,
+        }
+
+    def take_timings(self):
+        """Return the time spent to render and write the file the first time
+        it is called, and zeros afterwards."""
+        return {name: self._timings.pop(name, 0.0)
+                for name in ('render', 'write')}
+
+    def __del__(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+
 def _make_mutant_node(nd):
     """Create a new logic for mutation that can be activated from .cfg file."""
     curent_rt_up = nd.rt_up
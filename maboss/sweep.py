@@ -0,0 +1,105 @@
+"""Functions to run a simulation over a set of parameter values."""
+
+
+import copy
+import itertools
+from sys import stderr
+
+import pandas as pd
+
+from .batch import iter_simulations
+
+
+def parameter_grid(**values):
+    """
+    Return the list of all the combinations of parameter values.
+
+    :param values: for each parameter, the list of its values
+
+    **Example**
+
+    >>> parameter_grid(max_time=[10, 20], **{'$u_p53': [0.5, 1]})
+    [{'max_time': 10, '$u_p53': 0.5}, {'max_time': 10, '$u_p53': 1},
+     {'max_time': 20, '$u_p53': 0.5}, {'max_time': 20, '$u_p53': 1}]
+    """
+    names = list(values)
+    return [dict(zip(names, point))
+            for point in itertools.product(*(values[n] for n in names))]
+
+
+def sweep(simul, points, summaries=("nodes",), max_workers=None):
+    """
+    Run a simulation for several values of its parameters.
+
+    :param simul: the simulation whose parameters are modified
+    :type simul: :py:class:`Simulation`
+    :param points: the parameter values, either as a list of dictionaries
+        that are given to :py:meth:`Simulation.update_parameters`, or as a
+        dictionary giving the values of each parameter, in which case all
+        their combinations are simulated (see :py:func:`parameter_grid`)
+    :param summaries: the values that are kept for each point:
+
+        * ``'nodes'`` the probability of each node at the last time point
+        * ``'fixpoints'`` the probability of each fixed point
+        * a function that takes a :py:class:`Result` and returns a dictionary
+          or a pandas Series
+
+    :param int max_workers: passed to :py:func:`run_simulations`
+    :rtype: pandas DataFrame, with one row per point indexed by the parameter
+        values, and columns indexed by the summary name and label
+
+    The bnd file is written only once, and only a cfg file is written for each
+    point. Each :py:class:`Result` is summarized and removed as soon as its
+    simulation completes.
+    """
+    if isinstance(points, dict):
+        points = parameter_grid(**points)
+    names = []
+    for point in points:
+        names.extend(p for p in point if p not in names)
+    summaries = [(s, _builtin_summaries[s]) if isinstance(s, str)
+                 else (getattr(s, '__name__', repr(s)), s)
+                 for s in summaries]
+
+    simul._get_bnd_file()  # Written once, shared by the copies below
+    variants = {}
+    for i, point in enumerate(points):
+        variants[i] = copy.copy(simul)
+        variants[i].param = simul.param.copy()
+        variants[i].update_parameters(**point)
+
+    rows = [None] * len(points)
+    for i, result, error in iter_simulations(variants, max_workers):
+        if error is not None:
+            print("Error, point %s failed: %s" % (points[i], error),
+                  file=stderr)
+            continue
+        rows[i] = pd.concat({name: pd.Series(summary(result))
+                             for name, summary in summaries})
+        del result  # So that its output directory can be removed
+
+    index = pd.MultiIndex.from_tuples(
+        [tuple(point.get(n) for n in names) for point in points], names=names)
+    table = pd.DataFrame([row if row is not None else pd.Series(dtype=float)
+                          for row in rows])
+    table.index = index if len(names) > 1 else index.get_level_values(0)
+    # A node or a fixed point missing from a result has a 0 probability
+    succeeded = [row is not None for row in rows]
+    builtin = table.columns.get_level_values(0).isin(list(_builtin_summaries))
+    table.loc[succeeded, builtin] = table.loc[succeeded, builtin].fillna(0)
+    return table
+
+
+def _last_nodes(result):
+    return result.get_last_nodes_probtraj()
+
+
+def _fixpoints(result):
+    table = result.get_fptable()
+    return pd.Series(table['Proba'].values, index=table['State'].values)
+
+
+_builtin_summaries = {'nodes': _last_nodes, 'fixpoints': _fixpoints}
+
+
+__all__ = ["sweep", "parameter_grid"]
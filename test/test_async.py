@@ -0,0 +1,105 @@
+"""Test Simulation.run_async, with the MaBoSS stub."""
+
+
+import sys
+sys.path.append('..')
+import asyncio
+import os
+import threading
+from concurrent.futures import CancelledError
+from os.path import dirname, join
+os.environ["PATH"] = (join(dirname(__file__), "stub") + os.pathsep
+                      + os.environ["PATH"])
+import maboss
+
+sim = maboss.load(join(dirname(__file__), "reprod_all.bnd"),
+                  join(dirname(__file__), "reprod_all.cfg"))
+sim.update_parameters(max_time=1)
+
+print("Check result")
+pending = sim.run_async()
+res = pending.result()
+assert(pending.done() and not pending.cancelled())
+assert(len(res.get_nodes_probtraj()) == 10)
+
+print("Check timeout and cancel")
+os.environ["MABOSS_STUB_DELAY"] = "0.5"
+pending = sim.run_async()
+assert(not pending.done())
+try:
+    pending.result(timeout=0.1)
+    assert(False)
+except TimeoutError:
+    pass
+assert(pending.cancel())
+assert(pending.done() and pending.cancelled())
+try:
+    pending.result()
+    assert(False)
+except CancelledError:
+    pass
+
+print("Check waits from several threads")
+failing = sim.copy()
+failing.update_parameters(max_time=-1)
+for _ in range(5):
+    pending = failing.run_async()
+    codes = []
+    threads = [threading.Thread(target=lambda: codes.append(
+        pending._result.wait())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while not pending.done():
+        pass
+    for thread in threads:
+        thread.join()
+    assert(codes == [1, 1, 1, 1] and pending._result.poll() == 1)
+
+
+print("Check await")
+
+
+async def run_two():
+    task = asyncio.ensure_future(sim.run_async())
+    try:
+        await asyncio.wait_for(task, 0.1)
+        assert(False)
+    except asyncio.TimeoutError:
+        pass
+    del os.environ["MABOSS_STUB_DELAY"]
+    return await sim.run_async()
+
+res = asyncio.run(run_two())
+assert(res.poll() == 0)
+
+print("Check monitor and early exit")
+seen = []
+res = sim.run_async().monitor(progress=lambda t, m: seen.append((t, m)))
+assert(len(seen) == 10 and seen[-1] == (0.9, 1.0))
+assert(res.stopped_at is None and len(res.get_fptable()) == 1)
+os.environ["MABOSS_STUB_DELAY"] = "0.05"
+res = sim.run_async().monitor(converged=lambda t, nodes: t >= 0.3,
+                              interval=0.01)
+del os.environ["MABOSS_STUB_DELAY"]
+assert(res.poll() == 0 and res.stopped_at == 0.3)
+assert(list(res.get_nodes_probtraj().index) == [0, 0.1, 0.2, 0.3])
+assert(len(res.get_fptable()) == 0)
+# MaBoSS terminates before monitor reads its output
+finished = sim.run_async()._result
+os.waitid(os.P_PID, finished._process.pid, os.WEXITED | os.WNOWAIT)
+assert(finished.monitor(converged=lambda t, nodes: t >= 0.3) == 0)
+assert(finished.stopped_at is None)
+assert(len(finished.get_nodes_probtraj()) == 10)
+
+print("Check close before the end")
+os.environ["MABOSS_STUB_DELAY"] = "0.5"
+pending = sim.run_async()
+pending._result.close()
+assert(pending.done() and pending._result.wait() != 0)
+with maboss.Result(sim, wait=False) as res:
+    pass
+del os.environ["MABOSS_STUB_DELAY"]
+assert(res.wait() == res.poll() != 0)
+assert(not os.path.exists(res._path))
+
+print("All test passed")
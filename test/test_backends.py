@@ -0,0 +1,78 @@
+"""Test the backends in backends.py, with the MaBoSS stub."""
+
+
+import sys
+sys.path.append('..')
+import os
+import tempfile
+import threading
+from os.path import dirname, join
+os.environ["PATH"] = (join(dirname(__file__), "stub") + os.pathsep
+                      + os.environ["PATH"])
+import maboss
+from maboss.backends import LocalBackend, SpoolBackend, spool_worker
+
+sim = maboss.load(join(dirname(__file__), "reprod_all.bnd"),
+                  join(dirname(__file__), "reprod_all.cfg"))
+sim.update_parameters(max_time=1)
+local = sim.run()
+
+print("Check LocalBackend")
+res = sim.run(backend=LocalBackend())
+assert(res.get_states_probtraj().equals(local.get_states_probtraj()))
+
+print("Check SpoolBackend")
+spool = tempfile.mkdtemp()
+with SpoolBackend(spool, workers=2, retries=1) as backend:
+    res = sim.run(backend=backend)
+    assert(res.get_states_probtraj().equals(local.get_states_probtraj()))
+    assert(res.get_fptable().equals(local.get_fptable()))
+    assert(res.timings['process'] > 0)
+    res.close()
+    assert(os.listdir(join(spool, 'done')) == [])
+
+    failing = sim.copy()
+    failing.update_parameters(max_time=-1)
+    results = maboss.run_simulations([sim, failing, sim], backend=backend,
+                                     in_memory=True)
+    assert(list(results.errors) == [1])
+    assert(results[2].get_nodes_probtraj().equals(
+        local.get_nodes_probtraj()))
+    # The failed job was submitted twice, and only the last one is kept
+    assert(len(os.listdir(join(spool, 'done'))) == 1)
+assert(not [f for f in os.listdir(spool) if f.startswith('stop')])
+
+print("Check timeouts")
+os.environ["MABOSS_STUB_DELAY"] = "0.5"
+with SpoolBackend(tempfile.mkdtemp(), workers=1, timeout=0.2) as backend:
+    del os.environ["MABOSS_STUB_DELAY"]
+    res = sim.run(backend=backend)
+    assert(res._err)
+
+print("Check lost workers")
+spool = tempfile.mkdtemp()
+with SpoolBackend(spool, stale=0.3, interval=0.01) as backend:
+    def take_and_die():
+        while not os.listdir(join(spool, 'queue')):
+            pass
+        name = os.listdir(join(spool, 'queue'))[0]
+        os.rename(join(spool, 'queue', name), join(spool, 'running', name))
+    dying = threading.Thread(target=take_and_die)
+    dying.start()
+    res = sim.run(backend=backend)
+    dying.join()
+    assert(res._err == -1)
+    assert(os.listdir(join(spool, 'running')) == [])
+
+print("Check jobs that cannot be run")
+os.makedirs(join(spool, 'queue', '0'))
+worker = threading.Thread(target=spool_worker, args=(spool, 0.01, 'w'))
+worker.start()
+res = sim.run(backend=backend)
+assert(res.get_states_probtraj().equals(local.get_states_probtraj()))
+with open(join(spool, 'done', '0', 'status.json')) as status_file:
+    assert('job.json' in status_file.read())
+open(join(spool, 'stop.w'), 'w').close()
+worker.join()
+
+print("All test passed")
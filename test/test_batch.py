@@ -0,0 +1,51 @@
+"""Test the batch runner in batch.py, with the MaBoSS stub."""
+
+
+import sys
+sys.path.append('..')
+import os
+from os.path import dirname, join
+os.environ["PATH"] = (join(dirname(__file__), "stub") + os.pathsep
+                      + os.environ["PATH"])
+import maboss
+from maboss import batch
+
+sim = maboss.load(join(dirname(__file__), "reprod_all.bnd"),
+                  join(dirname(__file__), "reprod_all.cfg"))
+sim.update_parameters(max_time=1, thread_count=2)
+
+print("Check run_simulations on a dictionary")
+variants = {(nd, mut): maboss.copy_and_mutate(sim, [nd], mut)
+            for nd in ["CDH1", "p21"] for mut in ["ON", "OFF"]}
+results = batch.run_simulations(variants, max_workers=3)
+assert(set(results) == set(variants))
+assert(not results.errors)
+for key in results:
+    assert(len(results[key].get_nodes_probtraj()) == 10)
+assert(variants[("CDH1", "ON")].param["$High_CDH1"] == 1)
+assert(variants[("CDH1", "OFF")].param["$High_CDH1"] == 0)
+
+print("Check errors")
+failing = sim.copy()
+failing.update_parameters(max_time=-1)
+results = batch.run_simulations([sim, failing])
+assert(set(results) == {0, 1})
+assert(list(results.errors) == [1])
+
+print("Check iter_simulations")
+keys = [key for key, result, error in batch.iter_simulations([sim] * 3)]
+assert(sorted(keys) == [0, 1, 2])
+
+print("Check timing_table")
+results = batch.run_simulations([sim, sim.copy()])
+results[0].get_nodes_probtraj()
+table = batch.timing_table(results)
+assert(list(table.index) == [0, 1])
+for column in ["render", "write", "process", "process_user",
+               "process_system", "max_rss", "output_size"]:
+    assert((table[column] >= 0).all())
+assert(table["max_rss"].min() > 0)
+assert(table["read"][0] > 0 and table["build"][0] > 0)
+assert(table["read"].isna()[1])
+
+print("All test passed")
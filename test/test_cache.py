@@ -0,0 +1,62 @@
+"""Test the result cache in cache.py, with the MaBoSS stub."""
+
+
+import sys
+sys.path.append('..')
+import os
+import tempfile
+from os.path import dirname, join
+os.environ["PATH"] = (join(dirname(__file__), "stub") + os.pathsep
+                      + os.environ["PATH"])
+import maboss
+from maboss.cache import ResultCache
+
+sim = maboss.load(join(dirname(__file__), "reprod_all.bnd"),
+                  join(dirname(__file__), "reprod_all.cfg"))
+sim.update_parameters(max_time=1, use_physrandgen=0)
+cache = ResultCache(tempfile.mkdtemp())
+
+print("Check hits and misses")
+first = sim.run(cache=cache)
+second = sim.run(cache=cache)
+assert(cache.hits == 1 and cache.misses == 1)
+assert(second.get_states_probtraj().equals(first.get_states_probtraj()))
+del second
+assert(cache.stats()['entries'] == 1)
+third = sim.run(cache=cache, in_memory=True)
+assert(third._path is None and cache.stats()['entries'] == 1)
+assert(third.get_states_probtraj().equals(first.get_states_probtraj()))
+
+sim2 = sim.copy()
+sim2.update_parameters(seed_pseudorandom=1)
+assert(cache.key(sim2) != cache.key(sim))
+sim2.run(cache=cache)
+assert(cache.misses == 2)
+
+print("Check physrandgen bypass")
+sim3 = sim.copy()
+sim3.update_parameters(use_physrandgen=1)
+sim3.run(cache=cache)
+sim3.run(cache=cache)
+assert(cache.bypassed == 2 and cache.stats()['entries'] == 2)
+
+print("Check LRU eviction")
+cache.max_size = cache.stats()['size'] // 2 + 1
+sim.run(cache=cache)  # sim becomes the most recently used entry
+sim4 = sim.copy()
+sim4.update_parameters(seed_pseudorandom=2)
+sim4.run(cache=cache)
+assert(cache.stats()['entries'] == 1)
+assert(os.path.isdir(join(cache.path, cache.key(sim4))))
+
+print("Check that a hit survives the eviction of its entry")
+hit = sim4.run(cache=cache)
+cache.clear()
+assert(cache.stats()['entries'] == 0)
+assert(len(hit.get_states_probtraj()) == 10)
+assert(hit.get_fptable()['Proba'][0] == 0.5)
+hit_path = hit._path
+hit.close()
+assert(not os.path.exists(hit_path))
+
+print("All test passed")
@@ -0,0 +1,59 @@
+"""Test the parsing of bnd and cfg files in gsparser.py."""
+
+
+import sys
+sys.path.append('..')
+from os.path import dirname, join
+from maboss import gsparser
+
+
+def grammar_bnd(string):
+    return [(token.name, {v.lhs: v.rhs for v in token.interns})
+            for token in gsparser.bnd_grammar.parseString(string)]
+
+
+def grammar_cfg(string):
+    return [gsparser._cfg_token(token)
+            for token in gsparser.cfg_grammar.parseString(string)]
+
+
+with open(join(dirname(__file__), "reprod_all.bnd")) as f:
+    bnd = f.read()
+with open(join(dirname(__file__), "reprod_all.cfg")) as f:
+    cfg = f.read()
+
+print("Check that the scanners agree with the grammars")
+assert(gsparser._scan_bnd(bnd) == grammar_bnd(bnd))
+assert(gsparser._scan_cfg(cfg) == grammar_cfg(cfg))
+
+bnd_cases = ["// comment\nnode A { logic = (A & !B) ;\n rate_up=1 ;rate_down = 0;}"
+             "\nNODE B{ u = 1; }// end"]
+cfg_cases = ["$a = 1 + 2 ;\n[A, B].istate = 0.5 [0, 1] , 0.5[1,1];\n"
+             "[C].istate = 1[1], 0 [0];\nA.istate = TRUE;max_time = 1e2;\n"
+             "x = true; A.is_internal = 0; A.refstate=1; // end\n"]
+for string in bnd_cases:
+    assert(gsparser._scan_bnd(string) == grammar_bnd(string))
+for string in cfg_cases:
+    assert(gsparser._scan_cfg(string) == grammar_cfg(string))
+
+print("Check the fallback to the grammars")
+fallback_bnd = ["Node A { logic = A // comment; still logic\n; rate_up = 1;}",
+                "Node A { rate_up = 1; } garbage"]
+fallback_cfg = ["max_time = 10; A .istate = 1; other = 2;",
+                "$ORa = 1;", "x = 1x;", "[A, B].istate = 1 [0, 1],;"]
+for string in fallback_bnd:
+    try:
+        gsparser._scan_bnd(string)
+        assert(False)
+    except gsparser._Unsupported:
+        pass
+    assert(gsparser._parse_bnd(string) == grammar_bnd(string))
+for string in fallback_cfg:
+    try:
+        gsparser._scan_cfg(string)
+        assert(False)
+    except gsparser._Unsupported:
+        pass
+    assert(gsparser._parse_cfg(string) == grammar_cfg(string))
+
+print("All test passed")
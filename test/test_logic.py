@@ -19,4 +19,14 @@ assert(not logic._check_logic_defined(['foo', 'bar'], ['(foo && barr)']))
 print("    light syntax")
 assert(logic._check_logic_defined(['a', 'b', 'c', 'd'], ["a & !b AND c OR a & b & !c OR !a & b & c"]))
 
+print("Check parse and variables")
+assert(logic.parse("a & !b | c") == ('or', ('and', ('var', 'a'),
+                                            ('not', ('var', 'b'))),
+                                     ('var', 'c')))
+assert(logic.parse("(a XOR True)") == ('xor', ('var', 'a'), ('cst', True)))
+assert(logic.parse("a b") is None)
+assert(logic.variables("a & !b | (a ^ c_1)") == {'a', 'b', 'c_1'})
+assert(logic.variables("True") == frozenset())
+assert(logic.variables("!!a") is None)
+
 print("All test passed")
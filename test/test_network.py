@@ -0,0 +1,66 @@
+"""Test the copies of Network and Simulation objects."""
+
+
+import sys
+sys.path.append('..')
+import io
+from os.path import dirname, join
+import maboss
+
+sim = maboss.load(join(dirname(__file__), "reprod_all.bnd"),
+                  join(dirname(__file__), "reprod_all.cfg"))
+net = sim.network
+
+print("Check that copies share their nodes until they are accessed")
+copy = net.copy()
+assert(all(dict.__getitem__(copy, name) is dict.__getitem__(net, name)
+           for name in net))
+copy['p21'].rt_up = '2'
+assert(net['p21'].rt_up != '2')
+net['CDH1'].logExp = 'CDH2'
+assert(copy['CDH1'].logExp != 'CDH2')
+assert(dict.__getitem__(copy, 'VIM') is dict.__getitem__(net, 'VIM'))
+for nd in copy.values():
+    nd.rt_down = '3'
+assert(net['VIM'].rt_down != '3')
+
+print("Check that references to the nodes of the original are kept")
+kept = net['p21']
+copy = net.copy()
+kept.rt_up = 'CHANGED'
+assert(copy['p21'].rt_up != 'CHANGED')
+assert(net['p21'] is kept)
+kept.rt_up = 'AGAIN'
+assert(net['p21'].rt_up == 'AGAIN')
+second = copy.copy()
+kept = net['ZEB1']
+kept.rt_down = '5'
+assert(copy['ZEB1'].rt_down != '5' and second['ZEB1'].rt_down != '5')
+copy['ZEB2'].rt_down = '6'
+assert(net['ZEB2'].rt_down != '6' and second['ZEB2'].rt_down != '6')
+
+print("Check that printing a copy keeps the nodes shared")
+mutants = [net.copy() for _ in range(3)]
+shared = [set(mutant._shared) for mutant in mutants]
+mutants[0].print_bnd(out=io.StringIO())
+str(net)
+assert([mutant._shared for mutant in mutants] == shared)
+assert(all(dict.__getitem__(mutant, 'VIM') is dict.__getitem__(net, 'VIM')
+           for mutant in mutants))
+
+print("Check that copies have their own initial states")
+copy.set_istate('VIM', [0, 1])
+assert(net._initState['VIM'] != copy._initState['VIM'])
+
+print("Check Simulation.copy")
+sim.refstate['p21'] = '1'
+mutant = maboss.copy_and_mutate(sim, ['CDH1'], 'ON')
+assert(not sim.network._peek('CDH1').is_mutant)
+assert(mutant.network._peek('CDH1').is_mutant)
+assert(mutant.refstate == {'p21': '1'})
+for simul in (sim, mutant):
+    bnd = io.StringIO()
+    simul.print_bnd(out=bnd)
+    assert(("$High_CDH1" in bnd.getvalue()) == (simul is mutant))
+
+print("All test passed")
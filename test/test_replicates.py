@@ -0,0 +1,79 @@
+"""Test the replicates in replicates.py, with the MaBoSS stub."""
+
+
+import sys
+sys.path.append('..')
+import os
+import re
+from os.path import dirname, join
+os.environ["PATH"] = (join(dirname(__file__), "stub") + os.pathsep
+                      + os.environ["PATH"])
+import numpy as np
+import maboss
+from maboss.replicates import merge_results, run_adaptive
+
+sim = maboss.load(join(dirname(__file__), "reprod_all.bnd"),
+                  join(dirname(__file__), "reprod_all.cfg"))
+sim.update_parameters(max_time=1)
+
+print("Check merge_results")
+runs = []
+for seed in [1, 2]:
+    variant = sim.copy()
+    variant.update_parameters(seed_pseudorandom=seed)
+    runs.append(variant.run())
+merged = merge_results(runs, sample_counts=[1, 3])
+expected = (runs[0].get_states_probtraj().add(
+    3 * runs[1].get_states_probtraj(), fill_value=0) / 4).fillna(0)
+assert(list(merged.get_states_probtraj().columns) == list(expected.columns))
+assert(np.allclose(merged.get_states_probtraj().values, expected.values))
+nodes = [run.get_nodes_probtraj() for run in runs]
+assert(np.allclose(merged.get_nodes_probtraj().values,
+                   (nodes[0] + 3 * nodes[1]).values / 4))
+# With two runs, the standard error is proportional to their difference
+assert(np.allclose(merged.get_nodes_error().values,
+                   np.sqrt(3) / 4 * abs(nodes[0] - nodes[1]).values))
+assert(merged.get_fptable()['Proba'][0] == 0.5)
+assert(runs[0].get_nodes_error() is None)
+assert(runs[0].get_states_error() is None)
+states = [run.get_states_probtraj() for run in runs]
+states = [table.reindex(columns=expected.columns, fill_value=0)
+          for table in states]
+assert(np.allclose(merged.get_states_error().values,
+                   np.sqrt(3) / 4 * abs(states[0] - states[1]).values))
+failing = sim.copy()
+failing.update_parameters(max_time=-1)
+merged = merge_results([runs[0], failing.run()])
+assert(merged.get_states_probtraj().equals(runs[0].get_states_probtraj()))
+try:
+    merge_results([])
+    assert(False)
+except ValueError:
+    pass
+
+print("Check run_replicates")
+replicated = sim.run_replicates(3)
+runs = []
+for seed in [100, 101, 102]:
+    variant = sim.copy()
+    variant.update_parameters(seed_pseudorandom=seed)
+    runs.append(variant.run())
+nodes = np.array([run.get_nodes_probtraj().values for run in runs])
+assert(np.allclose(replicated.get_nodes_probtraj().values, nodes.mean(0)))
+assert(np.allclose(replicated.get_nodes_error().values,
+                   nodes.std(0) / np.sqrt(2)))
+assert(replicated.get_states_error(sparse=True).shape
+       == replicated.get_states_probtraj().shape)
+
+print("Check run_adaptive")
+adaptive = sim.run_adaptive(target_error=0.05, batch_size=100)
+assert(adaptive.get_nodes_error().iloc[-1].max() <= 0.05)
+assert(np.allclose(adaptive.get_states_probtraj().sum(axis=1), 1))
+samples = int(re.search(r"sample_count = (\d+);",
+                         adaptive._model_text()[1]).group(1))
+assert(samples >= 200 and samples % 100 == 0)
+capped = run_adaptive(sim, target_error=1e-6, batch_size=100,
+                      max_samples=400)
+assert("sample_count = 400;" in capped._model_text()[1])
+
+print("All test passed")
@@ -0,0 +1,94 @@
+"""Test the table builders in result.py."""
+
+
+import sys
+sys.path.append('..')
+from os.path import dirname, join
+import numpy as np
+import pandas as pd
+from maboss import result
+
+probtraj_file = join(dirname(__file__), "small_probtraj.csv")
+probtraj = pd.read_csv(probtraj_file, sep="\t")
+
+print("Check get_states and get_nodes")
+assert(result.get_states(probtraj) == {"<nil>", "A", "A -- B", "B"})
+assert(result.get_nodes(probtraj) == {"<nil>", "A", "B"})
+
+print("Check make_trajectory_table")
+states = result.make_trajectory_table(probtraj)
+assert(list(states.columns) == ["<nil>", "A", "A -- B", "B"])
+assert(list(states.index) == [0.0, 0.5, 1.0, 1.5])
+assert(states["A -- B"][0.5] == 0.5)
+assert(states["<nil>"][1.0] == 0)
+assert(states["B"][1.5] == 0.75)
+assert(all(abs(states.sum(axis=1) - 1) < 1e-12))
+
+print("Check make_node_proba_table")
+nodes = result.make_node_proba_table(probtraj)
+assert(list(nodes.columns) == ["<nil>", "A", "B"])
+assert(nodes["A"][0.5] == 0.75)
+assert(nodes["B"][1.0] == 0.875)
+assert(nodes["A"][1.5] == 0.25)
+assert(nodes["<nil>"][0.0] == 0.5)
+
+print("Check ProbTraj")
+parsed = result.ProbTraj(probtraj)
+assert(list(parsed.states) == ["<nil>", "A", "A -- B", "B"])
+assert(parsed.nodes() == ["<nil>", "A", "B"])
+assert(parsed.matrix.nnz == 10)
+assert(parsed.states_table().equals(states))
+assert(parsed.nodes_table().equals(nodes))
+assert(list(parsed.top_states(1)) == ["B"])
+assert(parsed.states_table(["<nil>", "B"]).equals(states[["<nil>", "B"]]))
+assert(list(parsed.last_table().columns) == ["A -- B", "B"])
+assert(parsed.last_table().iloc[0].sum() == 1)
+
+print("Check the bitset encoding of states")
+assert(parsed.bits().shape == (4, 1))
+assert(list(parsed.select(on=["A"])) == [False, True, True, False])
+assert(list(parsed.select(on=["A"], off=["B"])) == [False, True, False, False])
+assert(not parsed.select(on=["Unknown"]).any())
+assert(parsed.select(off=["Unknown"]).all())
+assert(list(parsed.condition_table(on=["A"])) == list(nodes["A"]))
+projected = parsed.projected_table(["B", "A"])
+assert(list(projected.columns) == ["<nil>", "A", "B", "B -- A"])
+assert(projected["B -- A"][1.0] == states["A -- B"][1.0])
+assert((projected["B"] + projected["B -- A"] == nodes["B"]).all())
+
+print("Check compact storage")
+compact = result.ProbTraj(probtraj, dtype=np.float32)
+assert(compact.matrix.dtype == np.float32)
+sparse_states = compact.states_table(sparse=True)
+assert(isinstance(sparse_states.columns, pd.CategoricalIndex))
+assert(sparse_states.sparse.density == 10 / 16)
+assert((sparse_states.sparse.to_dense().values == states.values).all())
+
+print("Check the streaming reader")
+lines = list(result.iter_probtraj(probtraj_file))
+assert([time for time, _, _ in lines] == [0.0, 0.5, 1.0, 1.5])
+assert(sum(len(line_states) for _, line_states, _ in lines) == 10)
+window = list(result.iter_probtraj(probtraj_file, start=0.5, until=1.5,
+                                   stride=2))
+assert([time for time, _, _ in window] == [0.5, 1.5])
+streamed = result.ProbTraj.from_file(probtraj_file)
+assert(streamed.states_table().equals(states))
+assert(streamed.nodes_table().equals(nodes))
+windowed = result.ProbTraj.from_file(probtraj_file, start=0.5, stride=2)
+assert(windowed.states_table().equals(parsed.window(start=0.5, stride=2)
+                                      .states_table()))
+assert(windowed.states_table().equals(
+    states.loc[[0.5, 1.5], list(windowed.states)]))
+last = result.read_last_probtraj(probtraj_file)
+assert(last[0] == lines[-1][0])
+assert(list(last[1]) == list(lines[-1][1]))
+assert(list(last[2]) == list(lines[-1][2]))
+
+print("Check node_convergence")
+converged = result.node_convergence(tolerance=0.1, window=2)
+assert(not converged(0, pd.Series({"A": 0.5})))
+assert(not converged(1, pd.Series({"A": 0.55})))
+assert(converged(2, pd.Series({"A": 0.6})))
+assert(not converged(3, pd.Series({"A": 0.6, "B": 0.2})))
+
+print("All test passed")
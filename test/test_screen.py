@@ -0,0 +1,45 @@
+"""Test the mutant screen in screen.py, with the MaBoSS stub."""
+
+
+import sys
+sys.path.append('..')
+import os
+from os.path import dirname, join
+os.environ["PATH"] = (join(dirname(__file__), "stub") + os.pathsep
+                      + os.environ["PATH"])
+import numpy as np
+import maboss
+from maboss.screen import mutant_screen, mutant_combinations
+
+sim = maboss.load(join(dirname(__file__), "reprod_all.bnd"),
+                  join(dirname(__file__), "reprod_all.cfg"))
+sim.update_parameters(max_time=1)
+
+print("Check mutant_combinations")
+combinations = mutant_combinations(["A", "B", "C"], order=2)
+assert(len(combinations) == 1 + 3 * 2 + 3 * 4)
+assert(combinations[0] == ())
+assert((("A", "OFF"), ("C", "ON")) in combinations)
+
+print("Check mutant_screen")
+table = mutant_screen(sim, ["p53", "p21"], order=2, compact=True)
+assert(len(table) == 9)
+assert(table.index.names == ["p53", "p21"])
+assert(table.dtypes.unique().tolist() == [np.float32])
+assert("<nil>" not in table.columns)
+assert(not table.isna().any().any())
+
+print("Check that the bnd file is shared by the mutants")
+mutant = maboss.copy_and_mutate(sim, ["p53", "p21"], "WT")
+mutant.mutate("p53", "OFF")
+res = mutant.run()
+last = res.get_nodes_probtraj().iloc[-1]
+assert(np.allclose(table.loc[("OFF", "WT")], last[table.columns]))
+assert(len(sim.mutations) == 0)
+
+outputs = mutant_screen(sim, ["p53"], outputs=["Metastasis", "Missing"])
+assert(list(outputs.columns) == ["Metastasis", "Missing"])
+assert(list(outputs.index) == ["WT", "ON", "OFF"])
+assert((outputs["Missing"] == 0).all())
+
+print("All test passed")
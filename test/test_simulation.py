@@ -0,0 +1,129 @@
+"""Test the Simulation class, with the MaBoSS stub."""
+
+
+import sys
+sys.path.append('..')
+import os
+from os.path import dirname, join
+os.environ["PATH"] = (join(dirname(__file__), "stub") + os.pathsep
+                      + os.environ["PATH"])
+import io
+import tempfile
+import numpy as np
+import scipy.sparse as sp
+import maboss
+from maboss.result import ProbTraj
+
+sim = maboss.load(join(dirname(__file__), "reprod_all.bnd"),
+                  join(dirname(__file__), "reprod_all.cfg"))
+sim.update_parameters(max_time=1)
+
+print("Check that the bnd file is shared while the network is unchanged")
+res1 = sim.run()
+sim.update_parameters(max_time=0.5)
+sim.network.set_istate('p21', [0, 1])
+res2 = sim.run()
+assert(res1._bnd == res2._bnd)
+assert(len(res2.get_nodes_probtraj()) == 5)
+
+print("Check that the bnd file is written again after a modification")
+sim.network['p21'].rt_up = '2'
+res3 = sim.run()
+assert(res3._bnd != res2._bnd)
+with open(res3._bnd) as bnd_file:
+    assert("rate_up = 2;" in bnd_file.read())
+sim.network['p21'].internal_var['x'] = '1'
+res3b = sim.run()
+assert(res3b._bnd != res3._bnd)
+with open(res3b._bnd) as bnd_file:
+    assert("x = 1" in bnd_file.read())
+sim.mutate('CDH1', 'ON')
+res4 = sim.run()
+with open(res4._bnd) as bnd_file:
+    assert("$High_CDH1" in bnd_file.read())
+
+print("Check that the bnd file lives as long as the results using it")
+bnd = res4._bnd
+sim.network['p21'].rt_up = '3'
+sim.run()
+assert(os.path.isfile(bnd))
+del res4
+assert(not os.path.isfile(bnd))
+
+print("Check the streaming accessors of the result")
+times = [time for time, _ in res2.iter_states_probtraj(stride=2)]
+assert(times == list(res2.get_states_probtraj().index[::2]))
+for time, marginals in res2.iter_nodes_probtraj(start=0.2):
+    expected = res2.get_nodes_probtraj().loc[time, marginals.index]
+    assert(all(abs(marginals - expected) < 1e-12))
+
+print("Check that an exported result can be read back")
+archive = join(tempfile.mkdtemp(), "res2.npz")
+res2.export(archive)
+loaded = maboss.load_result(archive)
+assert(loaded._path is None)
+assert(loaded.get_states_probtraj().equals(res2.get_states_probtraj()))
+assert(loaded.get_nodes_probtraj().equals(res2.get_nodes_probtraj()))
+assert(loaded.get_fptable().equals(res2.get_fptable()))
+assert(loaded._model_text() == res2._model_text())
+assert([time for time, _ in loaded.iter_states_probtraj(stride=2)] == times)
+
+print("Check the lifetime of the output directory")
+workdir = tempfile.mkdtemp()
+with sim.run(workdir=workdir) as res5:
+    assert(os.path.dirname(res5._path) == workdir)
+    assert(len(os.listdir(workdir)) == 1)
+assert(os.listdir(workdir) == [])
+res5.close()
+res6 = sim.run(workdir=workdir, in_memory=True)
+assert(os.listdir(workdir) == [])
+assert(len(res6.get_nodes_probtraj()) == 5)
+assert("max_time = 0.5;" in res6._model_text()[1])
+
+print("Check the input I/O timings")
+assert({'render', 'write', 'process', 'read', 'build'} <= set(res6.timings))
+assert(all(t >= 0 for t in res6.timings.values()))
+sim.network['p21'].rt_up = '4'
+first_run, second_run = sim.run(), sim.run()
+assert(first_run._bnd == second_run._bnd)
+assert(first_run._bnd_file.take_timings() == {'render': 0.0, 'write': 0.0})
+ram = maboss.ram_workdir()
+if ram is not None:
+    with sim.run(workdir=ram) as res7:
+        assert(res7._path.startswith(ram))
+
+print("Check continue_from_result")
+last = first_run.get_nodes_probtraj().iloc[-1]
+fresh = maboss.Result._from_output(first_run._path, first_run._bnd,
+                                   first_run._cfg, first_run.palette)
+assert(fresh.get_last_nodes_probtraj().equals(last))
+assert(fresh._probtraj is None)
+assert(abs(fresh.get_last_states_probtraj().sum() - 1) < 1e-9)
+following = sim.copy()
+following.continue_from_result(fresh)
+assert(following.network._initState['Metastasis'][1] == last['Metastasis'])
+assert(following.network._initState['Migration'][1] == 0)
+following.continue_from_result(fresh, joint=True)
+bound = following.network._attribution['Metastasis']
+joint = following.network._initState[bound]
+assert(abs(sum(joint.values()) - 1) < 1e-9)
+assert(abs(sum(p for state, p in joint.items()
+               if state[bound.index('Metastasis')])
+           - last['Metastasis']) < 1e-9)
+following.continue_from_result(fresh)
+assert(following.network._attribution['Metastasis'] == ['Metastasis'])
+hidden = sim.copy()
+for nd in hidden.network.names:
+    hidden.network[nd].is_internal = True
+nothing = ProbTraj._from_matrix(np.array([0.0]), np.array(["<nil>"]),
+                                sp.csr_matrix([[1.0]]))
+empty = maboss.Result._from_tables(nothing, fresh.get_fptable(), None, None,
+                                   fresh.palette)
+istate = dict(hidden.network._initState)
+hidden.continue_from_result(empty, joint=True)
+assert(hidden.network._initState == istate)
+cfg = io.StringIO()
+hidden.print_cfg(out=cfg)
+assert("[].istate" not in cfg.getvalue())
+
+print("All test passed")
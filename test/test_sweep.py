@@ -0,0 +1,39 @@
+"""Test the parameter sweep in sweep.py, with the MaBoSS stub."""
+
+
+import sys
+sys.path.append('..')
+import os
+from os.path import dirname, join
+os.environ["PATH"] = (join(dirname(__file__), "stub") + os.pathsep
+                      + os.environ["PATH"])
+import maboss
+from maboss.sweep import sweep, parameter_grid
+
+sim = maboss.load(join(dirname(__file__), "reprod_all.bnd"),
+                  join(dirname(__file__), "reprod_all.cfg"))
+sim.update_parameters(max_time=1)
+
+print("Check parameter_grid")
+grid = parameter_grid(max_time=[1, 2], **{'$u_p21': [0.5, 1, 2]})
+assert(len(grid) == 6)
+assert(grid[1] == {'max_time': 1, '$u_p21': 1})
+
+print("Check sweep over a grid")
+table = sweep(sim, {'seed_pseudorandom': [0, 1], 'max_time': [0.5, 1]},
+              summaries=["nodes", "fixpoints", lambda res: {'ok': 1}])
+assert(table.index.names == ['seed_pseudorandom', 'max_time'])
+assert(len(table) == 4)
+assert(set(table.columns.get_level_values(0)) == {'nodes', 'fixpoints',
+                                                  '<lambda>'})
+assert((table['fixpoints']['<nil>'] == 0.5).all())
+assert(not table.isna().any().any())
+assert(sim.param['seed_pseudorandom'] == 100)
+
+print("Check sweep over a list, with a failing point")
+table = sweep(sim, [{'max_time': 0.5}, {'max_time': -1}])
+assert(list(table.index) == [0.5, -1])
+assert(table.loc[0.5].notna().all())
+assert(table.loc[-1].isna().all())
+
+print("All test passed")